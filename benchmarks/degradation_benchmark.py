@@ -0,0 +1,85 @@
+"""Micro-benchmark of the degradation effects
+
+Compares the fused DegradationKernel with the former chain of separate effect functions
+(black and white, blur, darkness via HLS) at several resolutions.
+
+Run from the repository root:
+    python -m benchmarks.degradation_benchmark --image ./assets/images/image.png --repeat 20
+"""
+import argparse
+import time
+import cv2
+import numpy as np
+from enums.StageEnum import Stage
+from utils.DegradationKernel import DegradationKernel
+
+LEVEL_LIMIT = 100
+RESOLUTIONS = [(800, 480), (1280, 720), (1920, 1080), (3840, 2160)]
+CASES = [(Stage.BLACK_WHITE, 50), (Stage.BLURRY, 50), (Stage.LIGHTNESS, 50)]
+
+
+def legacy_black_white(image, level):
+    normalized_intensity = (level / LEVEL_LIMIT) ** 4
+    gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+    gray_rgb = cv2.cvtColor(gray, cv2.COLOR_GRAY2RGB)
+    return cv2.addWeighted(gray_rgb, normalized_intensity, image, 1 - normalized_intensity, 0)
+
+def legacy_blur(image, level):
+    max_kernel_size = 11
+    level = max(0, min(level, LEVEL_LIMIT))
+    kernel_size = 3 + int((level / LEVEL_LIMIT) * (max_kernel_size - 3))
+    if kernel_size % 2 == 0:
+        kernel_size += 1
+    return cv2.GaussianBlur(image, (kernel_size, kernel_size), 0)
+
+def legacy_darkness(image, level):
+    hls_image = cv2.cvtColor(image, cv2.COLOR_RGB2HLS)
+    h, l, s = cv2.split(hls_image)
+    level = max(0, min(level, LEVEL_LIMIT))
+    scale_factor = 1.0 - (level / float(LEVEL_LIMIT)) ** 10
+    l = cv2.multiply(l.astype(np.float32), scale_factor)
+    l = np.clip(l, 0, 255).astype(np.uint8)
+    return cv2.cvtColor(cv2.merge([h, l, s]), cv2.COLOR_HLS2RGB)
+
+def legacy_render(image, stage, level):
+    match stage:
+        case Stage.BLACK_WHITE:
+            return legacy_black_white(image, level)
+        case Stage.BLURRY:
+            return legacy_blur(legacy_black_white(image, LEVEL_LIMIT), level)
+        case Stage.LIGHTNESS:
+            return legacy_darkness(legacy_blur(legacy_black_white(image, LEVEL_LIMIT), LEVEL_LIMIT), level)
+
+def measure(function, repeat):
+    function()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the fused degradation kernel with the separate effect functions")
+    parser.add_argument("--image", default="./assets/images/image.png")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    source = cv2.imread(args.image, cv2.IMREAD_COLOR)
+    if source is None:
+        raise FileNotFoundError(f"Failed to load image from path: {args.image}")
+
+    print(f"{'resolution':>11} | {'stage':<18} | {'legacy ms':>9} | {'fused ms':>8} | {'speedup':>7} | {'max diff':>8}")
+    for width, height in RESOLUTIONS:
+        image = cv2.cvtColor(cv2.resize(source, (width, height)), cv2.COLOR_BGR2RGB)
+        image = np.ascontiguousarray(np.transpose(image, (1, 0, 2)))
+        kernel = DegradationKernel(image, level_limit = LEVEL_LIMIT)
+        out = np.empty_like(image)
+
+        for stage, level in CASES:
+            legacy_ms = measure(lambda: legacy_render(image, stage, level), args.repeat)
+            fused_ms = measure(lambda: kernel.render(stage, level, out = out), args.repeat)
+            difference = np.abs(legacy_render(image, stage, level).astype(np.int16) - kernel.render(stage, level).astype(np.int16)).max()
+            print(f"{width:>5}x{height:<5} | {str(stage):<18} | {legacy_ms:>9.2f} | {fused_ms:>8.2f} | {legacy_ms / fused_ms:>6.1f}x | {difference:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""End to end benchmark of the pipeline without hardware
+
+Runs the OutputController with the simulation backends: a synthetic (or video file) camera,
+scripted distance and touch streams, mock PWM devices and an offscreen pygame display.
+Reports the presented and rendered frames per second, the CPU time of every thread and the
+latency from a touch event to the first frame presented after it. With --trace every message is
+traced through the pipeline and the latency of every hop is reported and exported.
+
+Run from the repository root:
+    python -m benchmarks.pipeline_benchmark --duration 10
+    python -m benchmarks.pipeline_benchmark --duration 10 --asyncio --video ./faces.mp4
+    python -m benchmarks.pipeline_benchmark --duration 10 --trace trace.json
+"""
+import os
+
+# The display renders into an offscreen surface, this has to be set before pygame is imported
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import logging
+import statistics
+import threading
+import time
+from controller.OutputController import OutputController
+from dataclass.FaceRecognitionConfig import FaceRecognitionConfig
+from dataclass.ImageDisplayConfig import ImageDisplayConfig
+from dataclass.UltrasonicConfig import UltrasonicConfig
+from enums.ServicesEnum import ServicesEnum
+from outputs.ImageDisplayOutput import ImageDisplayOutput
+from outputs.LedOutput import LedOutput
+from outputs.VibrationMotorOutput import VibrationMotorOutput
+from sensors.FaceRecognition import FaceRecognition
+from sensors.TouchSensor import TouchSensor
+from sensors.UltrasonicSensor import UltrasonicSensor
+from simulation.MockPWM import MockPWM
+from simulation.ScriptedDistanceSensor import ScriptedDistanceSensor
+from simulation.ScriptedTouchDevice import ScriptedTouchDevice
+from simulation.SyntheticCamera import SyntheticCamera
+from utils.Profiler import profiler
+from utils.Tracer import Tracer
+
+class InstrumentedDisplay(ImageDisplayOutput):
+    """
+    Counts the presented frames and measures the latency from a touch message to the next presented frame.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.presented = 0
+        self.latencies = []
+        self._pending_timestamps = []
+
+    def receive_messages(self, *args, **kwargs):
+        messages = super().receive_messages(*args, **kwargs)
+        for message in messages:
+            if message.service == ServicesEnum.TouchSensor and isinstance(message.data, dict) and message.data.get("time"):
+                self._pending_timestamps.append(message.timestamp)
+        return messages
+
+    def _display_image(self, image):
+        super()._display_image(image)
+        now = time.monotonic_ns()
+        self.latencies.extend((now - timestamp) / 1e6 for timestamp in self._pending_timestamps)
+        self._pending_timestamps.clear()
+        self.presented += 1
+
+    def finish(self):
+        """
+        End the display loop on the main thread, the controller stops the services afterwards.
+        """
+        self._stop_event.set()
+        self._wake_event.set()
+
+class SimulatedController(OutputController):
+    def __init__(self, args):
+        super().__init__(debug = False, use_asyncio = args.asyncio, tracer = Tracer() if args.trace else None)
+        self.args = args
+        self.camera = SyntheticCamera(size = (640, 480), lores_size = FaceRecognitionConfig().lores_size(), fps = args.camera_fps, source = args.video)
+        self.distance_sensor = ScriptedDistanceSensor(seed = 1)
+        self.touch_device = ScriptedTouchDevice()
+
+    def _setup_services(self):
+        display_config = ImageDisplayConfig(fullscreen = False, window_size = (self.args.width, self.args.height))
+        self.outputs = {
+            ServicesEnum.ImageDisplayOutput: InstrumentedDisplay(service_name = ServicesEnum.ImageDisplayOutput.label, config = display_config, level_steps = 10),
+            ServicesEnum.VibrationMotorOutput: VibrationMotorOutput(service_name = ServicesEnum.VibrationMotorOutput.label, pwm_factory = MockPWM),
+            ServicesEnum.LedOutput: LedOutput(service_name = ServicesEnum.LedOutput.label, pwm_factory = MockPWM),
+        }
+        self.sensors = {
+            ServicesEnum.FaceRecognition: FaceRecognition(service_name = ServicesEnum.FaceRecognition.label, camera = self.camera),
+            ServicesEnum.UltrasonicSensor: UltrasonicSensor(service_name = ServicesEnum.UltrasonicSensor.label, config = UltrasonicConfig(threshold = 50), sensor = self.distance_sensor),
+            ServicesEnum.TouchSensor: TouchSensor(service_name = ServicesEnum.TouchSensor.label, device = self.touch_device),
+        }
+
+def thread_cpu_times():
+    """
+    Return the CPU time in seconds of every running thread by name, read from /proc on Linux.
+    """
+    ticks_per_second = os.sysconf("SC_CLK_TCK")
+    times = {}
+    for thread in threading.enumerate():
+        try:
+            with open(f"/proc/self/task/{thread.native_id}/stat") as stat:
+                fields = stat.read().rsplit(")", 1)[1].split()
+        except (OSError, TypeError):
+            continue
+        # utime and stime are the 14th and 15th field, the split starts at the 3rd
+        times[thread.name] = (int(fields[11]) + int(fields[12])) / ticks_per_second
+    return times
+
+def thread_label(name):
+    if name == "MainThread":
+        return f"{ServicesEnum.ImageDisplayOutput.label} (present)"
+    if name == ServicesEnum.ImageDisplayOutput.label:
+        return f"{name} (render)"
+    # Executor threads are named after their service with a numeric suffix
+    return name.rsplit("_", 1)[0] if name.rsplit("_", 1)[-1].isdigit() else name
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the pipeline end to end with simulated hardware")
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--warm-up", type=float, default=2, help="Seconds before the measurement starts")
+    parser.add_argument("--asyncio", action="store_true", help="Run the async services on one shared event loop")
+    parser.add_argument("--video", default=None, help="Video or image file for the camera instead of synthetic frames")
+    parser.add_argument("--camera-fps", type=float, default=30)
+    parser.add_argument("--width", type=int, default=800)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--profile", action="store_true", help="Report the cost of every effect and presentation step per stage")
+    parser.add_argument("--trace", default=None, help="Trace all messages and export them, .jsonl as JSON lines, otherwise in the Chrome trace format")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    # The services set their own log levels, only warnings and errors are of interest here
+    logging.disable(logging.INFO)
+    controller = SimulatedController(args)
+    if args.profile:
+        profiler.enable()
+    measurement = {}
+
+    def measure():
+        time.sleep(args.warm_up)
+        display = controller.outputs[ServicesEnum.ImageDisplayOutput]
+        measurement["start"] = (time.monotonic(), time.process_time(), thread_cpu_times(), display.presented, display.frame_exchange.published, len(display.latencies))
+        time.sleep(args.duration)
+        measurement["end"] = (time.monotonic(), time.process_time(), thread_cpu_times(), display.presented, display.frame_exchange.published, len(display.latencies))
+        display.finish()
+
+    threading.Thread(target=measure, name="Benchmark", daemon=True).start()
+    try:
+        controller.start()
+    finally:
+        controller.stop()
+
+    if "end" not in measurement:
+        print("The pipeline stopped before the measurement ended")
+        return
+
+    start_time, start_cpu, start_threads, start_presented, start_published, start_latencies = measurement["start"]
+    end_time, end_cpu, end_threads, end_presented, end_published, end_latencies = measurement["end"]
+    elapsed = end_time - start_time
+    display = controller.outputs[ServicesEnum.ImageDisplayOutput]
+
+    print(f"mode {'asyncio' if args.asyncio else 'threads'} | {elapsed:.1f} s | {len(end_threads)} threads")
+    print(f"presented {(end_presented - start_presented) / elapsed:6.1f} fps | rendered {(end_published - start_published) / elapsed:6.1f} fps | camera {controller.camera.frames_captured / (elapsed + args.warm_up):6.1f} fps")
+    print(f"process cpu {(end_cpu - start_cpu) / elapsed * 100:6.1f} %")
+
+    cpu_by_label = {}
+    for name, cpu in end_threads.items():
+        label = thread_label(name)
+        cpu_by_label[label] = cpu_by_label.get(label, 0) + cpu - start_threads.get(name, 0)
+    for label, cpu in sorted(cpu_by_label.items(), key=lambda item: -item[1]):
+        print(f"  {label:<36} {cpu / elapsed * 100:6.1f} %")
+
+    latencies = display.latencies[start_latencies:end_latencies]
+    if latencies:
+        quantiles = statistics.quantiles(latencies, n=20, method="inclusive") if len(latencies) > 1 else latencies * 19
+        print(f"touch to pixel | {len(latencies)} touches | p50 {statistics.median(latencies):7.2f} ms | p95 {quantiles[18]:7.2f} ms | max {max(latencies):7.2f} ms")
+    else:
+        print("touch to pixel | no touch presented")
+
+    if controller.tracer:
+        print("hop latency ms |  count |    p50 |    p95 |    p99 |    max")
+        for hop, snapshot in controller.tracer.summary().items():
+            if snapshot["count"]:
+                print(f"{hop:>14} | {snapshot['count']:>6} | {snapshot['p50']:6.2f} | {snapshot['p95']:6.2f} | {snapshot['p99']:6.2f} | {snapshot['max']:6.2f}")
+        if args.trace.endswith(".jsonl"):
+            controller.tracer.export_jsonl(args.trace)
+        else:
+            controller.tracer.export_chrome_trace(args.trace)
+        print(f"trace written to {args.trace}")
+
+    if args.profile:
+        print(profiler.report())
+
+
+if __name__ == "__main__":
+    main()
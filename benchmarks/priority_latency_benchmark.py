@@ -0,0 +1,143 @@
+"""Touch latency under a flood of low priority messages
+
+A consumer takes one message per frame from its incoming queue while flood services publish
+low priority messages faster than it can keep up. Touch events are published periodically,
+once with the urgent priority lane and once with the same priority as the flood (plain FIFO).
+The touch-to-consumer latency is measured from the message timestamp.
+The end to end touch-to-pixel latency is measured by benchmarks.pipeline_benchmark.
+
+The benchmark doubles as a regression check of the priority lanes: it exits with status 1 if an
+urgent message does not overtake a full low priority lane, or if touches sent through the urgent
+lane are dropped or their p95 latency exceeds --max-latency-ms. The FIFO run is only a reference.
+
+Run from the repository root:
+    python -m benchmarks.priority_latency_benchmark --duration 3
+"""
+import argparse
+import statistics
+import sys
+import threading
+import time
+from dataclass.Message import Message
+from enums.PriorityEnum import PriorityEnum
+from enums.QueuePolicyEnum import QueuePolicyEnum
+from enums.ServicesEnum import ServicesEnum
+from enums.TopicEnum import TopicEnum
+from utils.BoundedQueue import BoundedQueue
+from utils.MessageRouter import MessageRouter
+from utils.MessagingService import MessagingService
+
+class Service(MessagingService):
+    def __init__(self, service_name):
+        super().__init__()
+        self.service_name = service_name
+        self.config = None
+
+def flood(service, rate, stop_event):
+    interval = 1.0 / rate
+    while not stop_event.is_set():
+        service.send_message(service_name = service.service_name, data = {"distance": 10}, queue = service.outgoing_queue,
+                             topic = TopicEnum.Proximity, priority = PriorityEnum.Low, block = False)
+        time.sleep(interval)
+
+def touch(service, interval, priority, stop_event, sent):
+    while not stop_event.is_set():
+        service.send_message(service_name = service.service_name, data = {"touch": True}, queue = service.outgoing_queue,
+                             topic = TopicEnum.Restoration, priority = priority, block = False)
+        sent.append(1)
+        time.sleep(interval)
+
+def run(args, touch_priority):
+    router = MessageRouter()
+    consumer = Service(ServicesEnum.ImageDisplayOutput.label)
+    router.subscribe(TopicEnum.Restoration, consumer.incoming_queue)
+    router.subscribe(TopicEnum.Proximity, consumer.incoming_queue)
+
+    flooders = [Service(f"Flood {index}") for index in range(args.flooders)]
+    touch_sensor = Service(ServicesEnum.TouchSensor.label)
+    for service in flooders + [touch_sensor]:
+        router.register(service)
+
+    stop_event = threading.Event()
+    sent = []
+    threads = [threading.Thread(target=flood, args=(service, args.flood_rate / args.flooders, stop_event), daemon=True) for service in flooders]
+    threads.append(threading.Thread(target=touch, args=(touch_sensor, args.touch_interval, touch_priority, stop_event, sent), daemon=True))
+    for thread in threads:
+        thread.start()
+
+    latencies = []
+    end_time = time.monotonic() + args.duration
+    while time.monotonic() < end_time:
+        for message in consumer.receive_messages(max_messages=1):
+            if message.service == ServicesEnum.TouchSensor:
+                latencies.append((time.monotonic_ns() - message.timestamp) / 1e6)
+        time.sleep(args.frame_ms / 1000)
+
+    stop_event.set()
+    for thread in threads:
+        thread.join()
+
+    # Touches still queued at the end were not dropped, they only had no frame left to be consumed in
+    queued = sum(1 for message in consumer.receive_messages() if message.service == ServicesEnum.TouchSensor)
+    dropped_touches = len(sent) - len(latencies) - queued
+    return latencies, len(sent), dropped_touches, consumer.incoming_queue.stats()
+
+def check_overtake(capacity = 8):
+    """
+    An urgent message put into a queue whose capacity is used up by low priority messages is kept and returned first.
+    :return: An error description or None.
+    """
+    queue = BoundedQueue(capacity, QueuePolicyEnum.DropOldest)
+    for index in range(capacity):
+        queue.put(Message(service = "Flood", data = {"index": index}, priority = PriorityEnum.Low))
+    queue.put(Message(service = ServicesEnum.TouchSensor, data = {"touch": True}, priority = PriorityEnum.Urgent))
+
+    messages = queue.get_batch()
+    if not messages or messages[0].priority != PriorityEnum.Urgent:
+        return "the urgent message did not overtake the full low priority lane"
+    if len(messages) != capacity or queue.dropped != 1:
+        return f"expected {capacity} messages and one dropped low priority message, got {len(messages)} and {queue.dropped} dropped"
+    return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure touch latency under a flood of low priority messages")
+    parser.add_argument("--duration", type=float, default=3)
+    parser.add_argument("--flooders", type=int, default=4)
+    parser.add_argument("--flood-rate", type=float, default=2000, help="Flood messages per second in total")
+    parser.add_argument("--touch-interval", type=float, default=0.05)
+    parser.add_argument("--frame-ms", type=float, default=2, help="Time the consumer needs per message")
+    parser.add_argument("--max-latency-ms", type=float, default=20, help="Maximum p95 touch latency of the priority lanes")
+    args = parser.parse_args()
+
+    failures = []
+    error = check_overtake()
+    if error:
+        failures.append(f"overtake: {error}")
+
+    for label, priority in (("priority lanes", PriorityEnum.Urgent), ("fifo", PriorityEnum.Low)):
+        latencies, sent, dropped_touches, stats = run(args, priority)
+        p95 = None
+        if latencies:
+            quantiles = statistics.quantiles(latencies, n=20, method="inclusive") if len(latencies) > 1 else latencies * 19
+            p95 = quantiles[18]
+            print(f"{label:>14} | touches received {len(latencies):>4}/{sent:<4} | p50 {statistics.median(latencies):8.2f} ms | p95 {p95:8.2f} ms | max {max(latencies):8.2f} ms | dropped {stats['dropped']}")
+        else:
+            print(f"{label:>14} | no touch received, dropped {stats['dropped']}")
+
+        if priority != PriorityEnum.Urgent:
+            continue
+        if dropped_touches:
+            failures.append(f"{label}: {dropped_touches} of {sent} touches dropped")
+        if p95 is None:
+            failures.append(f"{label}: no touch received")
+        elif p95 > args.max_latency_ms:
+            failures.append(f"{label}: p95 touch latency {p95:.2f} ms exceeds {args.max_latency_ms} ms")
+
+    for failure in failures:
+        print(f"FAILED {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,63 @@
 from enums.ServicesEnum import ServicesEnum
 from outputs.BaseOutput import BaseOutput
-from outputs.ImageDisplayOutput import ImageDisplayOutput
-from outputs.VibrationMotorOutput import VibrationMotorOutput
-from outputs.LedOutput import LedOutput
 from sensors.BaseSensor import BaseSensor
-from sensors.FaceRecognition import FaceRecognition
-from sensors.TouchSensor import TouchSensor
-from sensors.UltrasonicSensor import UltrasonicSensor
-from utils.QueueListenerThread import QueueListenerThread
+from utils.MessageRouter import MessageRouter
+from utils.AsyncService import AsyncService
+from utils.EffectScheduler import EffectScheduler
+from utils.MetricsReporter import MetricsReporter
+from utils.WaveformEngine import WaveformEngine
 from dataclass.FaceRecognitionConfig import FaceRecognitionConfig
 from dataclass.UltrasonicConfig import UltrasonicConfig
 
+from concurrent.futures import ThreadPoolExecutor, wait
+from graphlib import TopologicalSorter
 from queue import Queue
+import asyncio
+import importlib
 import logging
+import threading
+import time
+
+# Modules of the services, only the modules of enabled services are imported with their dependencies like cv2 or pygame
+SERVICE_CLASSES = {
+    ServicesEnum.ImageDisplayOutput: ("outputs.ImageDisplayOutput", "ImageDisplayOutput"),
+    ServicesEnum.VibrationMotorOutput: ("outputs.VibrationMotorOutput", "VibrationMotorOutput"),
+    ServicesEnum.LedOutput: ("outputs.LedOutput", "LedOutput"),
+    ServicesEnum.FaceRecognition: ("sensors.FaceRecognition", "FaceRecognition"),
+    ServicesEnum.UltrasonicSensor: ("sensors.UltrasonicSensor", "UltrasonicSensor"),
+    ServicesEnum.TouchSensor: ("sensors.TouchSensor", "TouchSensor"),
+}
+
+# gpiozero creates its pin factory on first use, which is not thread safe, so the enabled GPIO users are set up one after another
+GPIO_SETUP_ORDER = (ServicesEnum.LedOutput, ServicesEnum.VibrationMotorOutput, ServicesEnum.UltrasonicSensor)
 
 class OutputController():
-    def __init__(self, config = None, debug = False):
+    def __init__(self, config = None, debug = False, use_asyncio = False, tracer = None, metrics_path = None, metrics_port = None, services = None):
+        """
+        :param use_asyncio: Run all async services as tasks on one shared event loop instead of a thread per service.
+            The image display keeps its render thread and presents on the main thread.
+        :param tracer: Optional utils.Tracer that follows every message from the sensor to the presented frame.
+        :param metrics_path: Optional file the metrics of all services are written to periodically.
+        :param metrics_port: Optional local port the metrics of all services are served on.
+        :param services: ServicesEnum of the services to run, defaults to all. The image display always runs.
+        """
         self.config = config or {}
         self.debug = debug
+        self.use_asyncio = use_asyncio
+        self.tracer = tracer
+        self.metrics_path = metrics_path
+        self.metrics_port = metrics_port
+        self.metrics_reporter = None
+        self.services = set(services or SERVICE_CLASSES) | {ServicesEnum.ImageDisplayOutput}
+        self.boot_times = {}
+        self.event_loop: asyncio.AbstractEventLoop = None
+        self._event_loop_thread = None
         self._logger = self._intialize_logger()
         self.sensors = None
         self.outputs = None
-        self.queue_threads = []
+        self.router = None
+        self.effect_scheduler = None
+        self.waveform_engine = None
         self.output_incoming_queues = None
         self.all_services = None
 
@@ -31,24 +67,32 @@ class OutputController():
         return logger
     
     def start(self):
+        boot_start = time.perf_counter()
         self._setup()
+        self._setup_services_concurrently()
+        self._start_event_loop()
         self._start_services_and_outputs()
-        self._start_queue_threads()
+        self._start_router()
+        self._start_metrics()
+        self.boot_times["total"] = time.perf_counter() - boot_start
+        self._log_boot_times()
         self._start_gui()
         self._logger.info("All services started")
 
     def stop(self):
-        self._stop_queue_threads()
+        self._stop_metrics()
+        self._stop_router()
         self._stop_services_and_outputs()
+        self._stop_effects()
+        self._stop_event_loop()
 
     def _start_gui(self):
         self.outputs[ServicesEnum.ImageDisplayOutput].trigger_action()
 
     def _setup(self):
-        
-        # self._setup_normal()
-        # self._setup_open()
-        self._setup_reservedly()
+        create_start = time.perf_counter()
+        self._setup_services()
+        self.boot_times["create"] = time.perf_counter() - create_start
 
         self.output_incoming_queues: dict[ServicesEnum, Queue] = {
             service_enum: output.incoming_queue 
@@ -56,24 +100,185 @@ class OutputController():
         }
 
         self.all_services = list(self.sensors.values()) + list(self.outputs.values())
+        self._setup_router()
+        self._setup_effects()
+        self._setup_tracing()
+
+    def _setup_services(self):
+        # self._setup_normal()
+        # self._setup_open()
+        self._setup_reservedly()
+
+    def _load_service_class(self, service_enum):
+        """
+        Import the module of a service on first use.
+        """
+        module_name, class_name = SERVICE_CLASSES[service_enum]
+        import_start = time.perf_counter()
+        module = importlib.import_module(module_name)
+        self.boot_times[f"import {service_enum.label}"] = self.boot_times.get(f"import {service_enum.label}", 0) + time.perf_counter() - import_start
+        return getattr(module, class_name)
+
+    def _create_services(self, arguments):
+        """
+        Create the enabled services.
+        :param arguments: Keyword arguments of the constructor by ServicesEnum, the service name is the label of the enum.
+        """
+        return {
+            service_enum: self._load_service_class(service_enum)(service_name = service_enum.label, **service_arguments)
+            for service_enum, service_arguments in arguments.items()
+            if service_enum in self.services
+        }
+
+    def _setup_services_concurrently(self):
+        """
+        Run the setup of all services concurrently, a service waits for the services in its setup_after.
+        The image display is set up on the main thread, pygame requires it.
+        """
+        services = {**self.outputs, **self.sensors}
+        display = self.outputs[ServicesEnum.ImageDisplayOutput]
+        dependencies = self._setup_dependencies(services)
+        order = TopologicalSorter(dependencies).static_order()
+
+        setup_start = time.perf_counter()
+        futures = {}
+        with ThreadPoolExecutor(max_workers=len(services), thread_name_prefix="Setup") as executor:
+            for service_enum in order:
+                service = services[service_enum]
+                if service is display:
+                    continue
+                # Dependencies are submitted first, every service has its own worker so waiting cannot block them
+                futures[service_enum] = executor.submit(self._prepare_service, service, [futures[dependency] for dependency in dependencies[service_enum]])
+
+            display.prepare()
+            for future in futures.values():
+                future.result()
+
+        self.boot_times["setup"] = time.perf_counter() - setup_start
+        for service in services.values():
+            self.boot_times[f"setup {service.service_name}"] = service.setup_time
+
+    def _setup_dependencies(self, services):
+        """
+        Return the enabled services every service has to wait for, from its setup_after and the chain of GPIO users.
+        Dependencies on disabled services are dropped, the image display cannot be a dependency.
+        """
+        dependencies = {}
+        for service_enum, service in services.items():
+            if ServicesEnum.ImageDisplayOutput in service.setup_after:
+                raise ValueError(f"{service.service_name} cannot be set up after the image display, the display is set up on the main thread and cannot be waited for")
+            dependencies[service_enum] = [dependency for dependency in service.setup_after if dependency in services]
+
+        gpio_services = [service_enum for service_enum in GPIO_SETUP_ORDER if service_enum in services]
+        for previous, service_enum in zip(gpio_services, gpio_services[1:]):
+            if previous not in dependencies[service_enum]:
+                dependencies[service_enum].append(previous)
+        return dependencies
+
+    def _prepare_service(self, service, dependencies):
+        wait(dependencies)
+        for dependency in dependencies:
+            # A failed dependency fails its dependents as well
+            dependency.result()
+        service.prepare()
+
+    def _log_boot_times(self):
+        breakdown = " - ".join(f"{name}: {seconds:.3f} s" for name, seconds in self.boot_times.items() if name != "total" and seconds is not None)
+        self._logger.info(f"Boot time {self.boot_times['total']:.3f} s | {breakdown}")
+
+    def _setup_router(self):
+        """
+        Subscribe every output to the messages addressed to it and to its topics, and let all services publish through the router.
+        """
+        self.router = MessageRouter(debug = self.debug)
+
+        for service_enum, output in self.outputs.items():
+            self.router.subscribe(service_enum, output.incoming_queue)
+            for topic in output.topics:
+                self.router.subscribe(topic, output.incoming_queue)
+
+        for service in self.all_services:
+            self.router.register(service)
         
+    def _setup_effects(self):
+        """
+        Let all actuator outputs play their effects on one shared timeline and their waveforms on one shared tick thread.
+        """
+        self.effect_scheduler = EffectScheduler()
+        self.waveform_engine = WaveformEngine()
+        for output in self.outputs.values():
+            if hasattr(output, "effect_scheduler"):
+                output.effect_scheduler = self.effect_scheduler
+            if hasattr(output, "waveform_engine"):
+                output.waveform_engine = self.waveform_engine
+
+    def _setup_tracing(self):
+        if not self.tracer:
+            return
+
+        self.router.tracer = self.tracer
+        for service in self.all_services:
+            service.tracer = self.tracer
+
+    def _start_metrics(self):
+        """
+        Publish the loop, queue and latency metrics of all services if a file or a port is configured.
+        """
+        if self.metrics_path is None and self.metrics_port is None:
+            return
+
+        self.metrics_reporter = MetricsReporter(path = self.metrics_path, port = self.metrics_port, debug = self.debug)
+        self.metrics_reporter.start()
+
+    def _stop_metrics(self):
+        if self.metrics_reporter:
+            self.metrics_reporter.stop()
+            self.metrics_reporter = None
+
+    def _stop_effects(self):
+        if self.effect_scheduler:
+            self.effect_scheduler.stop()
+        if self.waveform_engine:
+            self._logger.info(f"Waveform engine: {self.waveform_engine.stats()}")
+            self.waveform_engine.stop()
+
     def _start_services_and_outputs(self):
         """
         Initialize and start all sensors and outputs.
         """
         for service in self.all_services:
+            self._start_service(service)
+
+    def _start_service(self, service):
+        if self.event_loop and isinstance(service, AsyncService):
+            service.start(event_loop = self.event_loop)
+        else:
             service.start()
-        
 
-    def _start_queue_threads(self):
-        for service in self.all_services:
-            queue_thread = QueueListenerThread(
-                service=service,
-                output_queues=self.output_incoming_queues,
-                debug=service.debug
-            )
-            self.queue_threads.append(queue_thread)
-            queue_thread.start()
+    def _start_router(self):
+        self._start_service(self.router)
+
+    def _start_event_loop(self):
+        """
+        Start the shared event loop of the asyncio mode in one thread.
+        """
+        if not self.use_asyncio:
+            return
+
+        self.event_loop = asyncio.new_event_loop()
+        self._event_loop_thread = threading.Thread(target=self.event_loop.run_forever, name="Event Loop", daemon=True)
+        self._event_loop_thread.start()
+        self._logger.info("Shared event loop started")
+
+    def _stop_event_loop(self):
+        if not self.event_loop:
+            return
+
+        self.event_loop.call_soon_threadsafe(self.event_loop.stop)
+        self._event_loop_thread.join(timeout=5)
+        if not self._event_loop_thread.is_alive():
+            self.event_loop.close()
+        self.event_loop = None
 
     def _stop_services_and_outputs(self):
         """
@@ -85,21 +290,21 @@ class OutputController():
             except KeyboardInterrupt:
                 self._logger.warning(f"Interrupted while stopping {service.service_name}")
     
-    def _stop_queue_threads(self):
-        for thread in self.queue_threads:
-            thread.stop()
+    def _stop_router(self):
+        if self.router:
+            self.router.stop()
 
     def _setup_normal(self):
-        self.outputs: dict[ServicesEnum, BaseOutput] = {
-            ServicesEnum.ImageDisplayOutput: ImageDisplayOutput(service_name = ServicesEnum.ImageDisplayOutput.value, debug = True),
-            ServicesEnum.VibrationMotorOutput: VibrationMotorOutput(service_name=ServicesEnum.VibrationMotorOutput.value, debug = True),
-            ServicesEnum.LedOutput: LedOutput(service_name=ServicesEnum.LedOutput.value, debug = True )
-        }
-        self.sensors: dict[ServicesEnum, BaseSensor] = {
-            ServicesEnum.FaceRecognition: FaceRecognition(service_name = ServicesEnum.FaceRecognition.value, debug = True),
-            ServicesEnum.UltrasonicSensor: UltrasonicSensor(service_name = ServicesEnum.UltrasonicSensor.value, debug = True),
-            ServicesEnum.TouchSensor: TouchSensor(service_name = ServicesEnum.TouchSensor.value, debug = True),
-        } 
+        self.outputs: dict[ServicesEnum, BaseOutput] = self._create_services({
+            ServicesEnum.ImageDisplayOutput: dict(debug = True),
+            ServicesEnum.VibrationMotorOutput: dict(debug = True),
+            ServicesEnum.LedOutput: dict(debug = True),
+        })
+        self.sensors: dict[ServicesEnum, BaseSensor] = self._create_services({
+            ServicesEnum.FaceRecognition: dict(debug = True),
+            ServicesEnum.UltrasonicSensor: dict(debug = True),
+            ServicesEnum.TouchSensor: dict(debug = True),
+        })
 
     def _setup_open(self):
         faceRecognitionConfig = FaceRecognitionConfig(
@@ -123,16 +328,16 @@ class OutputController():
             restoration_duration_interval = 1,
             threshold = 300
         )
-        self.outputs: dict[ServicesEnum, BaseOutput] = {
-            ServicesEnum.ImageDisplayOutput: ImageDisplayOutput(service_name = ServicesEnum.ImageDisplayOutput.value, debug = True),
-            ServicesEnum.VibrationMotorOutput: VibrationMotorOutput(service_name=ServicesEnum.VibrationMotorOutput.value, debug = True),
-            ServicesEnum.LedOutput: LedOutput(service_name=ServicesEnum.LedOutput.value, debug = True )
-        }
-        self.sensors: dict[ServicesEnum, BaseSensor] = {
-            ServicesEnum.FaceRecognition: FaceRecognition(service_name = ServicesEnum.FaceRecognition.value, debug = True, config=faceRecognitionConfig),
-            ServicesEnum.UltrasonicSensor: UltrasonicSensor(service_name = ServicesEnum.UltrasonicSensor.value, debug = True, config = ultrasonicSensorConfig),
-            ServicesEnum.TouchSensor: TouchSensor(service_name = ServicesEnum.TouchSensor.value, debug = True),
-        }
+        self.outputs: dict[ServicesEnum, BaseOutput] = self._create_services({
+            ServicesEnum.ImageDisplayOutput: dict(debug = True),
+            ServicesEnum.VibrationMotorOutput: dict(debug = True),
+            ServicesEnum.LedOutput: dict(debug = True),
+        })
+        self.sensors: dict[ServicesEnum, BaseSensor] = self._create_services({
+            ServicesEnum.FaceRecognition: dict(debug = True, config = faceRecognitionConfig),
+            ServicesEnum.UltrasonicSensor: dict(debug = True, config = ultrasonicSensorConfig),
+            ServicesEnum.TouchSensor: dict(debug = True),
+        })
 
     def _setup_reservedly(self):
         faceRecognitionConfig = FaceRecognitionConfig(
@@ -156,13 +361,13 @@ class OutputController():
             restoration_duration_interval = 0.1,
             threshold = 50
         )
-        self.outputs: dict[ServicesEnum, BaseOutput] = {
-            ServicesEnum.ImageDisplayOutput: ImageDisplayOutput(service_name = ServicesEnum.ImageDisplayOutput.value, debug = True, level_steps=10),
-            ServicesEnum.VibrationMotorOutput: VibrationMotorOutput(service_name=ServicesEnum.VibrationMotorOutput.value, debug = True),
-            ServicesEnum.LedOutput: LedOutput(service_name=ServicesEnum.LedOutput.value, debug = True )
-        }
-        self.sensors: dict[ServicesEnum, BaseSensor] = {
-            ServicesEnum.FaceRecognition: FaceRecognition(service_name = ServicesEnum.FaceRecognition.value, debug = True, config=faceRecognitionConfig),
-            ServicesEnum.UltrasonicSensor: UltrasonicSensor(service_name = ServicesEnum.UltrasonicSensor.value, debug = True, config = ultrasonicSensorConfig),
-            ServicesEnum.TouchSensor: TouchSensor(service_name = ServicesEnum.TouchSensor.value, debug = True),
-        }
\ No newline at end of file
+        self.outputs: dict[ServicesEnum, BaseOutput] = self._create_services({
+            ServicesEnum.ImageDisplayOutput: dict(debug = True, level_steps = 10),
+            ServicesEnum.VibrationMotorOutput: dict(debug = True),
+            ServicesEnum.LedOutput: dict(debug = True),
+        })
+        self.sensors: dict[ServicesEnum, BaseSensor] = self._create_services({
+            ServicesEnum.FaceRecognition: dict(debug = True, config = faceRecognitionConfig),
+            ServicesEnum.UltrasonicSensor: dict(debug = True, config = ultrasonicSensorConfig),
+            ServicesEnum.TouchSensor: dict(debug = True),
+        })
\ No newline at end of file
@@ -18,3 +18,27 @@ class FaceRecognitionConfig(BaseConfig):
     restoration_duration_min: int = 1
     restoration_duration_interval: int = 2
     stage: Stage = Stage.BLACK_WHITE
+    motion_gate: bool = True
+    motion_threshold: int = 25
+    motion_min_area: float = 0.002
+    motion_learning_rate: float = 0.05
+    motion_roi_margin: float = 0.25
+    motion_recheck_interval: float = 2.0
+    full_detection_interval: int = 5
+    track_roi_margin: float = 0.5
+    track_iou_threshold: float = 0.3
+    track_max_missed: int = 30
+    frame_size: Tuple[int, int] = field(default_factory=lambda: (640, 480))
+    use_process: bool = False
+    use_lores_luma: bool = True
+    ring_slots: int = 4
+
+    def lores_size(self):
+        """
+        Size of the camera lores stream that replaces the downscaling, or None if it is not used.
+        YUV420 needs even dimensions.
+        """
+        if not self.use_lores_luma:
+            return None
+        width, height = self.frame_size
+        return (int(width * self.downscale_factor) // 2 * 2, int(height * self.downscale_factor) // 2 * 2)
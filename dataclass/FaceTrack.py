@@ -0,0 +1,14 @@
+from dataclasses import dataclass
+
+@dataclass(slots=True)
+class FaceTrack:
+    id: int
+    x: int
+    y: int
+    w: int
+    h: int
+    missed: int = 0
+
+    @property
+    def box(self):
+        return (self.x, self.y, self.w, self.h)
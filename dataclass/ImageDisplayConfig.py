@@ -0,0 +1,14 @@
+from dataclasses import dataclass
+
+@dataclass
+class ImageDisplayConfig:
+    frame_cache_budget_mb: float = 64
+    prewarm_frame_cache: bool = True
+    target_fps: float = 30
+    idle_timeout: float = 0.5
+    scale_to_display: bool = True
+    render_scale: float = 1.0
+    dust_opacity: float = 1.0
+    dust_return_rate: float = 0.02
+    fullscreen: bool = True
+    window_size: tuple = (800, 480)
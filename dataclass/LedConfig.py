@@ -13,4 +13,5 @@ B Pin -> any free GPIO Pin -> e.g. Pin 11 (GPIO 17)
 class LedConfig(BaseConfig):
     r_pin: int = 22
     g_pin: int = 27
-    b_pin: int = 17
\ No newline at end of file
+    b_pin: int = 17
+    fade_time: float = 0.2
@@ -2,20 +2,43 @@ import time
 from dataclasses import dataclass, field
 from typing import Any, Dict, Optional
 from enums.ServicesEnum import ServicesEnum
+from enums.TopicEnum import TopicEnum
+from enums.PriorityEnum import PriorityEnum
 
-@dataclass
+@dataclass(slots=True)
 class Message:
-    service: str
+    service: ServicesEnum | str
     data: any
-    timestamp: float = field(default_factory=lambda: time.time())
+    timestamp: int = field(default_factory=time.monotonic_ns)
     metadata: Optional[Dict[str, Any]] = None
     target_output: Optional[ServicesEnum] = None
+    topic: Optional[TopicEnum] = None
+    priority: PriorityEnum = PriorityEnum.Normal
+    # Set by utils.Tracer when tracing is on, 0 means not traced
+    trace_id: int = 0
+    # Set for pooled messages, see utils.MessagePool
+    pool: Any = field(default=None, repr=False, compare=False)
+    references: int = field(default=1, repr=False, compare=False)
 
     def validate(self):
         """
         Validate the message. Raise an exception if the message is invalid.
         """
-        if not self.service or not isinstance(self.service, str):
-            raise ValueError("Service name must be a non-empty string")
+        if not self.service or not isinstance(self.service, (ServicesEnum, str)):
+            raise ValueError("Service must be a ServicesEnum or a non-empty string")
         if self.metadata and not isinstance(self.metadata, dict):
-            raise ValueError("Metadata must be a dictonary")
\ No newline at end of file
+            raise ValueError("Metadata must be a dictonary")
+
+    @property
+    def requests_restoration(self):
+        """
+        True if the message asks the outputs for a restoration, i.e. carries its duration and strength.
+        """
+        return isinstance(self.data, dict) and bool(self.data.get("time")) and bool(self.data.get("level_steps"))
+
+    def release(self):
+        """
+        Hand a pooled message back to its pool once every receiver released it. Does nothing for other messages.
+        """
+        if self.pool is not None:
+            self.pool.release(self)
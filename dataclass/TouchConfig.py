@@ -13,4 +13,8 @@ class TouchConfig(BaseConfig):
     restoration_duration_min: int = 1
     restoration_duration_interval: int = 1
     stage: Stage = Stage.BLACK_WHITE
-    sleep: bool = False
\ No newline at end of file
+    sleep: bool = False
+    swipe_update_rate: float = 30
+    swipe_gain: float = 1.0
+    swipe_reference_velocity: float = 1.0
+    gesture_grid: tuple = (16, 10)
@@ -7,4 +7,9 @@ class UltrasonicConfig(BaseConfig):
     trigger_pin: int = 23
     max_distance: float = 5.0
     threshold: int = 100
-    loop_refresh_rate: float = 0.1
+    loop_refresh_rate: float = 0.05
+    filter_window: int = 5
+    filter_alpha: float = 0.5
+    hysteresis: int = 10
+    update_distance: int = 5
+    refresh_factor: float = 0.7
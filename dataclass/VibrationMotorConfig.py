@@ -12,4 +12,5 @@ IN Pin -> any free GPIO Pin -> e.g. Pin 22 (GPIO 25)
 class VibrationMotorConfig(BaseConfig):
     in_pin: int = 25
     vibration_time: int = 2
-    restoration_duration: int = 1
\ No newline at end of file
+    restoration_duration: int = 1
+    ramp_time: float = 0.05
@@ -0,0 +1,6 @@
+from enum import Enum, auto
+
+class EffectModeEnum(Enum):
+    Preempt = auto()
+    Extend = auto()
+    Blend = auto()
@@ -0,0 +1,6 @@
+from enum import Enum
+
+class PresenceEventEnum(Enum):
+    Enter = "Enter"
+    Update = "Update"
+    Leave = "Leave"
@@ -0,0 +1,7 @@
+from enum import IntEnum
+
+class PriorityEnum(IntEnum):
+    Urgent = 0
+    High = 1
+    Normal = 2
+    Low = 3
@@ -0,0 +1,7 @@
+from enum import Enum, auto
+
+class QueuePolicyEnum(Enum):
+    DropOldest = auto()
+    DropNewest = auto()
+    Block = auto()
+    Coalesce = auto()
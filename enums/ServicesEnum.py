@@ -1,9 +1,36 @@
-from enum import Enum
-
-class ServicesEnum(Enum):
-    FaceRecognition = "Face Recognition"
-    UltrasonicSensor = "Ultrasonic Sensor"
-    TouchSensor = "Touch Sensor"
-    ImageDisplayOutput = "Image Display Output"
-    VibrationMotorOutput = "Vibration Motor Output"
-    LedOutput = "LED Output"
\ No newline at end of file
+from enum import IntEnum
+
+class ServicesEnum(IntEnum):
+    FaceRecognition = 1
+    UltrasonicSensor = 2
+    TouchSensor = 3
+    ImageDisplayOutput = 4
+    VibrationMotorOutput = 5
+    LedOutput = 6
+
+    @property
+    def label(self):
+        """
+        Human readable name of the service, used as service_name.
+        """
+        return _LABELS[self]
+
+    @classmethod
+    def from_label(cls, label):
+        """
+        Return the member for a service name or None if the name belongs to no known service.
+        """
+        return _MEMBERS_BY_LABEL.get(label)
+
+    def __str__(self):
+        return self.label
+
+_LABELS = {
+    ServicesEnum.FaceRecognition: "Face Recognition",
+    ServicesEnum.UltrasonicSensor: "Ultrasonic Sensor",
+    ServicesEnum.TouchSensor: "Touch Sensor",
+    ServicesEnum.ImageDisplayOutput: "Image Display Output",
+    ServicesEnum.VibrationMotorOutput: "Vibration Motor Output",
+    ServicesEnum.LedOutput: "LED Output",
+}
+_MEMBERS_BY_LABEL = {label: member for member, label in _LABELS.items()}
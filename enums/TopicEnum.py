@@ -0,0 +1,7 @@
+from enum import Enum
+
+class TopicEnum(Enum):
+    Restoration = "Restoration"
+    Proximity = "Proximity"
+    Haptic = "Haptic"
+    Gesture = "Gesture"
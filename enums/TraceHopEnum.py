@@ -0,0 +1,8 @@
+from enum import IntEnum
+
+class TraceHopEnum(IntEnum):
+    Emit = 0
+    Route = 1
+    Receive = 2
+    Render = 3
+    Present = 4
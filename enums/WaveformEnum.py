@@ -0,0 +1,8 @@
+from enum import Enum, auto
+
+class WaveformEnum(Enum):
+    Step = auto()
+    Ramp = auto()
+    Fade = auto()
+    Pulse = auto()
+    Breathe = auto()
@@ -1,7 +1,10 @@
+import argparse
 import logging
 import colorlog
 from controller.OutputController import OutputController
 from enums.ServicesEnum import ServicesEnum
+from utils.Profiler import profiler
+from utils.Tracer import Tracer
 
 logger = logging.getLogger(__name__)
 
@@ -26,10 +29,33 @@ def setup_logging():
         handlers=[console_handler],
     )
 
+def export_trace(tracer, path):
+    if path.endswith(".jsonl"):
+        tracer.export_jsonl(path)
+    else:
+        tracer.export_chrome_trace(path)
+    logging.info(f"Trace written to {path}")
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Run the installation")
+    parser.add_argument("--metrics-file", default=None, help="Write the metrics of all services to this JSON file periodically")
+    parser.add_argument("--metrics-port", type=int, default=None, help="Serve the metrics of all services on http://127.0.0.1:<port>/metrics")
+    parser.add_argument("--disable", nargs="*", default=[], choices=[service.name for service in ServicesEnum if service != ServicesEnum.ImageDisplayOutput],
+                        help="Services that are not started, their modules and hardware libraries are not loaded")
+    parser.add_argument("--asyncio", action="store_true", help="Run the async services as tasks on one shared event loop instead of a thread per service")
+    parser.add_argument("--trace", default=None, help="Trace all messages and write them to this file at shutdown, .jsonl as JSON lines, otherwise in the Chrome trace format")
+    parser.add_argument("--profile", action="store_true", help="Measure every effect and presentation step and print the cost per stage at shutdown")
+    return parser.parse_args()
+
 def main():
+    arguments = parse_arguments()
     setup_logging()
+    if arguments.profile:
+        profiler.enable()
     
-    logic = OutputController(debug=False)
+    services = [service for service in ServicesEnum if service.name not in arguments.disable]
+    tracer = Tracer() if arguments.trace else None
+    logic = OutputController(debug=False, use_asyncio=arguments.asyncio, tracer=tracer, metrics_path=arguments.metrics_file, metrics_port=arguments.metrics_port, services=services)
 
     try:
         logic.start()
@@ -39,6 +65,10 @@ def main():
     finally:
         logic.stop()
         logging.info("All services stopped. Exiting")
+        if tracer:
+            export_trace(tracer, arguments.trace)
+        if arguments.profile:
+            print(profiler.report())
         
 
 if __name__ == "__main__":
@@ -3,6 +3,9 @@ from utils.MessagingService import MessagingService
 from utils.ThreadedService import ThreadedService
 
 class BaseOutput(ThreadedService, MessagingService, ABC):
+    # Topics the incoming queue is subscribed to in addition to messages addressed to the output itself
+    topics = ()
+
     def __init__(self, service_name, config = None, debug = False):
         ThreadedService.__init__(self, service_name, debug)
         MessagingService.__init__(self)
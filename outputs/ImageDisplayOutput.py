@@ -1,34 +1,73 @@
 import cv2
+import math
 import time
 import logging
+import threading
 import pygame
 import numpy as np
 from outputs.BaseOutput import BaseOutput
+from dataclass.ImageDisplayConfig import ImageDisplayConfig
 from enums.StageEnum import Stage
-from enums.ServicesEnum import ServicesEnum
+from enums.TopicEnum import TopicEnum
+from enums.QueuePolicyEnum import QueuePolicyEnum
+from enums.TraceHopEnum import TraceHopEnum
+from utils.DegradationKernel import DegradationKernel
+from utils.FrameCache import FrameCache
+from utils.FrameExchange import FrameExchange
+from utils.Profiler import profiler
 
 logger = logging.getLogger(__name__)
 
 class ImageDisplayOutput(BaseOutput):
     LEVEL_LIMIT = 100
+    topics = (TopicEnum.Restoration, TopicEnum.Proximity, TopicEnum.Gesture)
+    queue_policy = QueuePolicyEnum.Coalesce
 
-    def __init__(self, service_name, config = None, debug = False, image_path = "./assets/images/image.png", level_steps = 1, step_intervall_seconds = 0.1):
+    def __init__(self, service_name, config: ImageDisplayConfig = None, debug = False, image_path = "./assets/images/image.png", overlay_path = "./assets/images/overlay.png", level_steps = 1, step_intervall_seconds = 0.1):
         """
         A sensor-like class for displaying images, extending BaseOutput.
         :param service_name: Unique name for the service.
-        :param config: Optional configuration dictionary.
+        :param config: Optional ImageDisplayConfig.
         :param debug: Enable debugging logs.
         :param image_path: Path to the initial image.
+        :param overlay_path: Path to the dust overlay, an image with alpha channel.
         :param level_steps: Step interval until the level limit is reached
         :param step_interval_seconds: Time interval between steps, in seconds.
         """
-        self.config = config
+        config = config or ImageDisplayConfig()
         super().__init__(service_name, config, debug)
+        self.config = config
         logger.setLevel(logging.DEBUG if debug else logging.INFO)
         self.window_name = self.service_name
         self.image_path = image_path
+        self.overlay_path = overlay_path
         self.original_image = None
         self.current_image = None
+        self.kernel: DegradationKernel = None
+        self.frame_cache = FrameCache(budget_bytes = self.config.frame_cache_budget_mb * 1024 * 1024)
+        self._warm_up_thread = None
+        self.screen = None
+        self._surface = None
+        self._present_surface = None
+        self._image_rect = None
+        self._presented_frame = None
+
+        # Dust is wiped away by swipes and slowly settles again
+        self.dust_opacity = self.config.dust_opacity
+        self._dust_surface = None
+        self._dust_alpha = None
+        self._dust_update_time = time.monotonic()
+
+        # The display loop sleeps until a message, a frame, a restoration deadline or stop wakes it up
+        self._wake_event = threading.Event()
+        self._render_event = threading.Event()
+        self.incoming_queue.signal = self._wake_event
+        self.frame_exchange = FrameExchange(signal = self._wake_event)
+
+        # Traced messages wait here until a frame reflecting them was rendered and presented
+        self._trace_lock = threading.Lock()
+        self._traces_to_render = []
+        self._traces_to_present = []
 
         self.stage = Stage.START
         self.level = 0
@@ -50,108 +89,262 @@ class ImageDisplayOutput(BaseOutput):
         logger.info("Setting up ImageDisplayOutput")
         
         pygame.init()
-        self.screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+        if self.config.fullscreen:
+            self.screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+        else:
+            self.screen = pygame.display.set_mode(self.config.window_size)
         pygame.mouse.set_visible(False)
         pygame.display.set_caption(self.window_name)
         
-        self.current_image = cv2.imread(self.image_path, cv2.IMREAD_COLOR)
+        image = cv2.imread(self.image_path, cv2.IMREAD_COLOR)
 
-        if self.current_image is None:
+        if image is None:
             logger.error(f"Failed to load image from path: {self.image_path}")
         else:
             logger.debug("Initial image loaded successfully.")
-            self.original_image = self.current_image.copy()
+            self.original_image = self._to_display_layout(self._scale_to_display(image))
+            self.current_image = self.original_image
+            self.kernel = DegradationKernel(self.original_image, level_limit = self.LEVEL_LIMIT)
+            self.frame_exchange.allocate(self.original_image.shape, self.original_image.dtype)
+            self.frame_cache.clear()
+            self._setup_surface()
+            self._setup_dust()
+
+            if self.config.prewarm_frame_cache:
+                self._warm_up_thread = threading.Thread(target=self._warm_up_frame_cache, daemon=True)
+                self._warm_up_thread.start()
 
     def loop(self):  
-        if not self.reverse:
-            self.current_image = self._degrade_image()
-            self.send_message(service_name = self.service_name, data = self.current_image, queue = self.internal_queue, block = False )
-        else:
-            self.current_image = self._restore_image()
-            self.send_message(service_name = self.service_name, data = self.current_image, queue = self.internal_queue, block = False )
-        
-        time.sleep(self.step_intervall_seconds)
+        image = self._restore_image() if self.reverse else self._degrade_image()
+
+        # An unchanged stage returns the very same frame, it does not need to be presented again
+        if image is not self.current_image:
+            self.current_image = image
+            # The traces are handed over before the frame, so they are presented with it
+            if self.tracer is not None:
+                self._trace_rendered()
+            self.frame_exchange.publish(self.current_image)
+        elif self.tracer is not None and self._traces_to_render:
+            self._trace_unchanged()
+
+        # A new restoration request interrupts the wait, so it reaches the screen without a full step delay
+        with self.waiting():
+            self._render_event.wait(self.step_intervall_seconds)
+        self._render_event.clear()
 
     def trigger_action(self, data = None):
         """
         Display images in a loop. This function works only in the main thread due to the restriction of pygame.
+        The loop blocks until a new message, a new frame, the end of the restoration or the stop event wakes it up.
         """
+        frame_interval = 1.0 / self.config.target_fps if self.config.target_fps else 0
+        next_present_time = 0
 
         while not self._stop_event.is_set():
+            self._wake_event.clear()
             self._process_incoming_queue()
             self.reverse = True if self._is_restoration_active() else self._reset_restoration() 
-            self._process_internal_queue()
+
+            now = time.monotonic()
+            self._settle_dust(now)
+            if now >= next_present_time and (self._present_latest_frame() or self._present_dust()):
+                next_present_time = now + frame_interval
+            elif self.tracer is not None and self._traces_to_present and not self._has_pending_change():
+                # E.g. a swipe that did not change the dust visibly, the screen already shows its state
+                self._trace_presented()
+
+            pygame.event.pump()
+            self._wake_event.wait(self._get_wake_timeout(next_present_time))
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake_event.set()
+        self._render_event.set()
+        super().stop()
 
     def cleanup(self):
         """
         Clean up resources, like destroying the display window.
         """
         logger.info("Cleaning up ImageDisplayOutput")
+        if self._warm_up_thread:
+            self._warm_up_thread.join(timeout=1)
+        logger.debug(f"Frame cache: {self.frame_cache.stats()} - Frame exchange: {self.frame_exchange.stats()}")
         pygame.quit()
 
-    def _display_image(self, image):
+    def _to_display_layout(self, image):
         """
-        Utility function to display the current image using Pygame.
+        Convert a BGR image from OpenCV to the layout of pygame surfaces: RGB with the width as first axis.
+        All frames are kept in this layout, so presenting a frame is a plain copy into the display surface.
+        :param image: The BGR image as loaded by OpenCV.
         """
         image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        image_rgb = np.transpose(image_rgb, (1, 0, 2))  # Swap width and height dimensions
+        return np.ascontiguousarray(np.transpose(image_rgb, (1, 0, 2)))  # Swap width and height dimensions
+
+    def _scale_to_display(self, image):
+        """
+        Scale the image once at load time to fit the display resolution, keeping the aspect ratio.
+        The image is never upscaled here, a smaller image or a render scale below 1 is upscaled when presented,
+        so the effects never run on more pixels than necessary.
+        :param image: The BGR image as loaded by OpenCV.
+        """
+        screen_rect = self.screen.get_rect()
+        image_height, image_width = image.shape[:2]
 
-        if image_rgb.shape[0] > 0 and image_rgb.shape[1] > 0:
-            pygame_image = pygame.surfarray.make_surface(image_rgb)
-            self.screen.blit(pygame_image, (0, 0))
-            pygame.display.update()
+        if self.config.scale_to_display:
+            fit = min(screen_rect.width / image_width, screen_rect.height / image_height)
+            self._image_rect = pygame.Rect((0, 0), (max(1, round(image_width * fit)), max(1, round(image_height * fit))))
+            self._image_rect.center = screen_rect.center
+        else:
+            self._image_rect = pygame.Rect((0, 0), (image_width, image_height))
+
+        if screen_rect.contains(self._image_rect):
+            render_scale = min(1.0, self.config.render_scale)
+        else:
+            logger.warning("Image exceeds the screen and is not scaled to the display, render scale is ignored.")
+            render_scale = 1.0
+
+        render_width = max(1, round(min(self._image_rect.width, image_width) * render_scale))
+        render_height = max(1, round(min(self._image_rect.height, image_height) * render_scale))
+
+        if (render_width, render_height) != (image_width, image_height):
+            image = cv2.resize(image, (render_width, render_height), interpolation = cv2.INTER_AREA)
+
+        logger.info(f"Screen: {screen_rect.size} - Image: {(image_width, image_height)} - Render: {(render_width, render_height)} - Present: {self._image_rect.size}")
+        return image
+
+    def _setup_surface(self):
+        """
+        Create the persistent surface the frames are written into. If the frames are rendered at presentation size,
+        they are written directly into the display surface.
+        """
+        render_size = self.original_image.shape[:2]
+
+        self.screen.fill((0, 0, 0))
+        pygame.display.flip()
+
+        if self.screen.get_rect().contains(self._image_rect):
+            self._present_surface = self.screen.subsurface(self._image_rect)
+        else:
+            self._present_surface = None
+
+        if self._present_surface is not None and render_size == self._image_rect.size:
+            self._surface = self._present_surface
+        else:
+            self._surface = pygame.Surface(render_size).convert()
+
+    def _setup_dust(self):
+        """
+        Load the dust overlay at presentation size, it is blended over every frame with the current dust opacity.
+        """
+        overlay = cv2.imread(self.overlay_path, cv2.IMREAD_UNCHANGED)
+        if overlay is None or overlay.ndim != 3 or overlay.shape[2] != 4:
+            logger.warning(f"No dust overlay with alpha channel at path: {self.overlay_path}")
+            return
+
+        overlay = cv2.cvtColor(cv2.resize(overlay, self._image_rect.size, interpolation = cv2.INTER_AREA), cv2.COLOR_BGRA2RGBA)
+        self._dust_surface = pygame.image.frombuffer(overlay.tobytes(), self._image_rect.size, "RGBA").convert_alpha()
+
+    def _display_image(self, image):
+        """
+        Utility function to display the current image using Pygame.
+        The pixels are copied in place into the persistent surface, no surface is allocated per frame.
+        Frames rendered below the presentation size are upscaled directly into the display surface.
+        """
+        if image.shape[0] > 0 and image.shape[1] > 0:
+            stage = self.stage
+            with profiler.span(stage, "copy"):
+                pygame.surfarray.blit_array(self._surface, image)
+            if self._present_surface is None:
+                with profiler.span(stage, "blit"):
+                    self.screen.blit(self._surface, self._image_rect)
+            elif self._surface is not self._present_surface:
+                with profiler.span(stage, "scale"):
+                    pygame.transform.smoothscale(self._surface, self._image_rect.size, self._present_surface)
+            with profiler.span(stage, "dust"):
+                self._blit_dust()
+            self._presented_frame = image
+            with profiler.span(stage, "update"):
+                pygame.display.update(self._image_rect)
+            if self.tracer is not None:
+                self._trace_presented()
         else:
             logger.error("Image dimensions are invalid for display.")
     
-    def _apply_black_white(self, image, level):
+    def _blit_dust(self):
+        if self._dust_surface is None:
+            return
+        self._dust_alpha = self._get_dust_alpha()
+        if self._dust_alpha > 0:
+            self._dust_surface.set_alpha(self._dust_alpha)
+            self.screen.blit(self._dust_surface, self._image_rect)
+
+    def _has_pending_change(self):
         """
-        Gradually convert the image to black and white, or restore color.
-        :param image: The original image.
-        :param level: Percentage of black and white to apply (0-100%).
+        Check if a rendered frame or a visible dust change waits to be presented.
         """
-        normalized_intensity = (level / self.LEVEL_LIMIT) ** 4 # TODO: Erhöhe den Exponenten um einen noch langsameren Effekt zu haben 
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        gray_bgr = cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
-        blended = cv2.addWeighted(gray_bgr, normalized_intensity, image, 1 - normalized_intensity, 0)
+        return self.frame_exchange.has_frame() or (self._dust_surface is not None and self._get_dust_alpha() != self._dust_alpha)
 
-        return blended
+    def _get_dust_alpha(self):
+        return int(round(self.dust_opacity * 255))
 
-    def _apply_blur(self, image, level):
+    def _present_dust(self):
         """
-        Gradually apply a subtle blur filter, or restore sharpness.
-        :param image: The image to blur.
-        :param level: The current blur level (0 to 10).
+        Present the last frame again if the dust opacity changed visibly since it was presented.
+        :return: True if the frame was presented.
         """
-        max_kernel_size = 11
-        level = max(0, min(level, self.LEVEL_LIMIT))
-        scaled_level = int((level / self.LEVEL_LIMIT) * (max_kernel_size - 3))
-        kernel_size = 3 + scaled_level
+        if self._dust_surface is None or self._presented_frame is None or self._get_dust_alpha() == self._dust_alpha:
+            return False
+        self._display_image(self._presented_frame)
+        return True
 
-        if kernel_size % 2 == 0:
-            kernel_size += 1
+    def _settle_dust(self, now):
+        """
+        Let the wiped dust settle again with the configured rate.
+        """
+        elapsed = now - self._dust_update_time
+        self._dust_update_time = now
+        if self.dust_opacity < self.config.dust_opacity:
+            self.dust_opacity = min(self.config.dust_opacity, self.dust_opacity + self.config.dust_return_rate * elapsed)
 
+    def _render_frame(self, stage, level):
+        """
+        Return the frame for a stage and level. Every stage builds on the fully applied previous stage,
+        so the frames are deterministic, rendered by the fused kernel and served from the frame cache.
+        Levels are quantised to whole percent.
+        :param stage: The stage whose effect is applied partially.
+        :param level: The level of the stage effect (0 to LEVEL_LIMIT).
+        """
+        if stage not in (Stage.BLACK_WHITE, Stage.BLURRY, Stage.LIGHTNESS):
+            return self.original_image
 
-        return cv2.GaussianBlur(image, (kernel_size, kernel_size), 0)
-    
-    def _apply_darkness(self, image, level):
-        """
-        Gradually apply brightness change, or reduce brightness.
-        :param image: The image to adjust brightness.
-        :param level: The current brightness level (0 to LEVEL_LIMIT).
-        """       
-        hls_image = cv2.cvtColor(image, cv2.COLOR_BGR2HLS)
-        h, l, s = cv2.split(hls_image) 
-        level = max(0, min(level, self.LEVEL_LIMIT))
-        scale_factor = 1.0 - (level / float(self.LEVEL_LIMIT)) ** 10  # TODO: Erhöhe den Exponenten um einen noch langsameren Effekt zu haben 
-        
-        l = cv2.multiply(l.astype(np.float32), scale_factor)
-        l = np.clip(l, 0, 255).astype(np.uint8)
-        
-        hls_image = cv2.merge([h, l, s])
-        
-        return cv2.cvtColor(hls_image, cv2.COLOR_HLS2BGR)
+        level = int(round(max(0, min(level, self.LEVEL_LIMIT))))
+        if self.frame_cache.budget_bytes > 0:
+            return self.frame_cache.get((stage, level), lambda: self.kernel.render(stage, level))
+
+        # Without a cache the frame is rendered into a reusable buffer of the frame exchange
+        return self.kernel.render(stage, level, out = self.frame_exchange.acquire())
+
+    def _warm_up_frame_cache(self):
+        """
+        Render the frames of the degradation path in the background until the cache budget is used up.
+        """
+        step = max(1, int(self.level_steps_init))
+        frame_bytes = self.original_image.nbytes
+
+        for stage in (Stage.BLACK_WHITE, Stage.BLURRY, Stage.LIGHTNESS):
+            for level in list(range(0, self.LEVEL_LIMIT, step)) + [self.LEVEL_LIMIT]:
+                if self._stop_event.is_set():
+                    return
+                if self.frame_cache.contains((stage, level)):
+                    continue
+                if self.frame_cache.is_full(frame_bytes):
+                    logger.debug(f"Frame cache warm-up stopped at budget: {self.frame_cache.stats()}")
+                    return
+                self._render_frame(stage, level)
+
+        logger.debug(f"Frame cache warmed up: {self.frame_cache.stats()}")
 
-    
     def _degrade_image(self):
         match self.stage:
             case Stage.START:
@@ -162,7 +355,7 @@ class ImageDisplayOutput(BaseOutput):
                 if self.level < self.LEVEL_LIMIT:
                     self.level += self.level_steps
                     logger.debug(f"Degrading - {self.stage} - Level: {self.level - self.level_steps} -> {self.level} - Strenght: {self.level_steps}")
-                    return self._apply_black_white(self.current_image, self.level)
+                    return self._render_frame(self.stage, self.level)
                 else:
                     self.stage = Stage.BLURRY
                     self.level = 0
@@ -171,7 +364,7 @@ class ImageDisplayOutput(BaseOutput):
                 if self.level < self.LEVEL_LIMIT:
                     self.level += self.level_steps
                     logger.debug(f"Degrading - {self.stage} - Level: {self.level - self.level_steps} -> {self.level} - Strenght: {self.level_steps}")
-                    return self._apply_blur(self.current_image, self.level)
+                    return self._render_frame(self.stage, self.level)
                 else:
                     self.stage = Stage.LIGHTNESS
                     self.level = 0
@@ -180,7 +373,7 @@ class ImageDisplayOutput(BaseOutput):
                 if self.level < self.LEVEL_LIMIT:
                     self.level += self.level_steps
                     logger.debug(f"Degrading - {self.stage} - Level: {self.level - self.level_steps} -> {self.level} - Strenght: {self.level_steps}")
-                    return self._apply_darkness(self.current_image, self.level)
+                    return self._render_frame(self.stage, self.level)
                 else:
                     self.stage = Stage.END
                     self.level = self.LEVEL_LIMIT
@@ -203,10 +396,8 @@ class ImageDisplayOutput(BaseOutput):
             case Stage.LIGHTNESS:
                 if self.level > 0:
                     self.level = max(0, self.level - self.level_steps)
-                    logger.debug(f"Restoring - {self.stage} - Level: {self.level - self.level_steps} -> {self.level} - Strenght: {self.level_steps} Past Time: {int(time.time() - self.restoration_start_time)} - Remaining Time: {int(self.restoration_duration - (time.time() - self.restoration_start_time))}")
-                    temp_image = self._apply_black_white(self.original_image, self.LEVEL_LIMIT)
-                    temp_image = self._apply_blur(temp_image, self.LEVEL_LIMIT)
-                    return self._apply_darkness(temp_image, self.level)
+                    logger.debug(f"Restoring - {self.stage} - Level: {self.level - self.level_steps} -> {self.level} - Strenght: {self.level_steps} Past Time: {int(time.monotonic() - self.restoration_start_time)} - Remaining Time: {int(self.restoration_duration - (time.monotonic() - self.restoration_start_time))}")
+                    return self._render_frame(self.stage, self.level)
                 else:
                     """
                     TODO: Die Data ist noch hard-coded. Müsste eigentlich in die Config aufgenommen werden
@@ -218,16 +409,15 @@ class ImageDisplayOutput(BaseOutput):
                                     }, 
                                     queue = self.outgoing_queue, 
                                     block = False,
-                                    target_output = ServicesEnum.VibrationMotorOutput )
+                                    topic = TopicEnum.Haptic )
                     self.stage = Stage.BLURRY
                     self.level = self.LEVEL_LIMIT
                     return self.current_image
             case Stage.BLURRY:
                 if self.level > 0:
                     self.level = max(0, self.level - self.level_steps)
-                    logger.debug(f"Restoring - {self.stage} - Level: {self.level - self.level_steps} -> {self.level} - Strenght: {self.level_steps} Past Time: {int(time.time() - self.restoration_start_time)} - Remaining Time: {int(self.restoration_duration - (time.time() - self.restoration_start_time))}")
-                    temp_image = self._apply_black_white(self.original_image, self.LEVEL_LIMIT)
-                    return self._apply_blur(temp_image, self.level)
+                    logger.debug(f"Restoring - {self.stage} - Level: {self.level - self.level_steps} -> {self.level} - Strenght: {self.level_steps} Past Time: {int(time.monotonic() - self.restoration_start_time)} - Remaining Time: {int(self.restoration_duration - (time.monotonic() - self.restoration_start_time))}")
+                    return self._render_frame(self.stage, self.level)
                 else:
                     """
                     TODO: Die Data ist noch hard-coded. Müsste eigentlich in die Config aufgenommen werden
@@ -239,15 +429,15 @@ class ImageDisplayOutput(BaseOutput):
                                     }, 
                                     queue = self.outgoing_queue, 
                                     block = False,
-                                    target_output = ServicesEnum.VibrationMotorOutput )
+                                    topic = TopicEnum.Haptic )
                     self.stage = Stage.BLACK_WHITE
                     self.level = self.LEVEL_LIMIT
                     return self.current_image
             case Stage.BLACK_WHITE:
                 if self.level > 0:
                     self.level = max(0, self.level - self.level_steps)
-                    logger.debug(f"Restoring - {self.stage} - Level: {self.level - self.level_steps} -> {self.level} - Strenght: {self.level_steps} Past Time: {int(time.time() - self.restoration_start_time)} - Remaining Time: {int(self.restoration_duration - (time.time() - self.restoration_start_time))}")
-                    return self._apply_black_white(self.original_image, self.level)
+                    logger.debug(f"Restoring - {self.stage} - Level: {self.level - self.level_steps} -> {self.level} - Strenght: {self.level_steps} Past Time: {int(time.monotonic() - self.restoration_start_time)} - Remaining Time: {int(self.restoration_duration - (time.monotonic() - self.restoration_start_time))}")
+                    return self._render_frame(self.stage, self.level)
                 else:
                     """
                     TODO: Die Data ist noch hard-coded. Müsste eigentlich in die Config aufgenommen werden
@@ -259,57 +449,126 @@ class ImageDisplayOutput(BaseOutput):
                                     }, 
                                     queue = self.outgoing_queue, 
                                     block = False,
-                                    target_output = ServicesEnum.VibrationMotorOutput )
+                                    topic = TopicEnum.Haptic )
                     self.stage = Stage.START
                     return self.current_image
             case Stage.START:
-                logger.debug(f"Restoring - Reached Stage: {self.stage} Past Time: {int(time.time() - self.restoration_start_time)} - Remaining Time: {int(self.restoration_duration - (time.time() - self.restoration_start_time))}")
+                logger.debug(f"Restoring - Reached Stage: {self.stage} Past Time: {int(time.monotonic() - self.restoration_start_time)} - Remaining Time: {int(self.restoration_duration - (time.monotonic() - self.restoration_start_time))}")
                 return self.current_image
             case _:
                 return self.current_image
 
     def _process_incoming_queue(self):
         """
-        Process the incoming queue and update restoration values.
+        Drain the incoming queue and fold all messages into one update of the restoration values.
         """
-        if not self.incoming_queue.qsize() == 0:
-            message = self.receive_message(queue=self.incoming_queue)
+        messages = self.receive_messages(queue=self.incoming_queue)
+        if not messages:
+            return
+        if self.tracer is not None:
+            # Only the display records the receive hop, messages routed to other outputs as well would skew its latency
+            self.tracer.hops([message.trace_id for message in messages if message.trace_id], TraceHopEnum.Receive)
+
+        restorations = []
+
+        for message in messages:
             data = message.data
-            self.restoration = True
-            self.restoration_start_time = time.time()
             
-            """ if message.service == ServicesEnum.TouchSensor.value and message.metadata and message.metadata.get("type"):
-                # TODO: Hier muss dann die opacity vom overlay angepasst werden
-                print(message.metadata["type"])
-                return
-            """
             if message.metadata and isinstance(message.metadata, dict):
+                if message.metadata.get("type") == "swipe" and isinstance(data, dict):
+                    # Swipes only wipe the dust, they do not restore the image
+                    self.dust_opacity = max(0.0, self.dust_opacity - data.get("amount", 0))
+                    if message.trace_id:
+                        with self._trace_lock:
+                            self._traces_to_present.append(message.trace_id)
+                    message.release()
+                    continue
                 if "stage" in message.metadata:
                     self.stage = message.metadata["stage"]
                     logger.info(f"Stage updated to: {self.stage}")
             
-            if isinstance(data, dict):
-                if not self.reverse and data.get("time") and data.get("level_steps"): 
-                    self.restoration_duration = data["time"]
-                    self.level_steps = data["level_steps"]
-                elif data.get("time") and data.get("level_steps"):
-                    self.restoration_duration += data["time"] / self.difficulty
-                    self.level_steps += data["level_steps"] / self.difficulty
+            if message.requests_restoration:
+                restorations.append((data["time"], data["level_steps"]))
+                if message.trace_id:
+                    with self._trace_lock:
+                        self._traces_to_render.append(message.trace_id)
+
+            message.release()
+
+        if restorations:
+            self.restoration = True
+            self.restoration_start_time = time.monotonic()
+            # The first request of a new restoration sets the values, every further request adds to them scaled by the difficulty
+            if not self.reverse:
+                (self.restoration_duration, self.level_steps), restorations = restorations[0], restorations[1:]
+            self.restoration_duration += sum(duration for duration, _ in restorations) / self.difficulty
+            self.level_steps += sum(level_steps for _, level_steps in restorations) / self.difficulty
+            # Only a restoration interrupts the step delay, swipes and distance updates must not speed up the degradation
+            self._render_event.set()
+
+    def _trace_rendered(self):
+        with self._trace_lock:
+            traces, self._traces_to_render = self._traces_to_render, []
+            self._traces_to_present.extend(traces)
+        self.tracer.hops(traces, TraceHopEnum.Render)
+
+    def _trace_unchanged(self):
+        """
+        Close the traces of restoration requests that did not change the frame, e.g. at a stage transition.
+        The screen already shows the requested state once the pending frame, if any, is presented.
+        """
+        with self._trace_lock:
+            traces, self._traces_to_render = self._traces_to_render, []
+            # The display takes a pending frame before it collects the traces to present, so checking under the lock is safe
+            pending = self.frame_exchange.has_frame()
+            if pending:
+                self._traces_to_present.extend(traces)
+        self.tracer.hops(traces, TraceHopEnum.Render)
+        if not pending:
+            self.tracer.hops(traces, TraceHopEnum.Present)
+
+    def _trace_presented(self):
+        with self._trace_lock:
+            traces, self._traces_to_present = self._traces_to_present, []
+        self.tracer.hops(traces, TraceHopEnum.Present)
 
-    def _process_internal_queue(self):
+    def _present_latest_frame(self):
         """
-        Process the internal queue and display the current image.
+        Display the latest rendered frame, frames replaced in the meantime are skipped.
+        :return: True if an image was displayed.
         """
-        if not self.internal_queue.qsize() == 0:
-            current_image = self.receive_message(queue=self.internal_queue).data
+        current_image = self.frame_exchange.take()
+        if current_image is not None:
             self._display_image(current_image)
+            return True
+        return False
+
+    def _get_wake_timeout(self, next_present_time):
+        """
+        Calculate how long the display loop may sleep until it has work to do.
+        :param next_present_time: Earliest monotonic time the next frame may be presented at.
+        """
+        if self.incoming_queue.qsize() > 0:
+            return 0
+        
+        timeout = self.config.idle_timeout
+        if self.frame_exchange.has_frame() or (self._dust_surface is not None and self._get_dust_alpha() != self._dust_alpha):
+            timeout = min(timeout, max(0, next_present_time - time.monotonic()))
+        if self._dust_surface is not None and self.dust_opacity < self.config.dust_opacity and self.config.dust_return_rate > 0:
+            # Wake up when the settling dust reaches the next visible alpha step
+            next_alpha = (math.floor(self.dust_opacity * 255 + 0.5) + 0.5) / 255
+            timeout = min(timeout, max(0, (next_alpha - self.dust_opacity) / self.config.dust_return_rate))
+        if self.restoration:
+            remaining_time = self.restoration_duration - (time.monotonic() - self.restoration_start_time)
+            timeout = min(timeout, max(0, remaining_time))
+        return timeout
 
     def _is_restoration_active(self):
         """
         Check if the restoration process is active based on time.
         """
         if self.restoration:
-            elapsed_time = time.time() - self.restoration_start_time
+            elapsed_time = time.monotonic() - self.restoration_start_time
             return elapsed_time < self.restoration_duration
         return False
     
@@ -1,13 +1,25 @@
 import logging
 from outputs.BaseOutput import BaseOutput
+from utils.AsyncService import AsyncService
 from dataclass.LedConfig import LedConfig
-from gpiozero import PWMLED
-from time import sleep
+from enums.TopicEnum import TopicEnum
+from enums.QueuePolicyEnum import QueuePolicyEnum
+from enums.EffectModeEnum import EffectModeEnum
+from enums.WaveformEnum import WaveformEnum
+from enums.PresenceEventEnum import PresenceEventEnum
+from utils.EffectScheduler import EffectScheduler
+from utils.WaveformEngine import WaveformEngine
 
 logger = logging.getLogger(__name__)
 
-class LedOutput(BaseOutput):
-    def __init__(self, service_name, config:LedConfig=None, debug=False):
+class LedOutput(AsyncService, BaseOutput):
+    topics = (TopicEnum.Proximity,)
+    queue_policy = QueuePolicyEnum.Coalesce
+
+    def __init__(self, service_name, config:LedConfig=None, debug=False, pwm_factory=None):
+        """
+        :param pwm_factory: Optional function that creates a PWM device for a pin, e.g. a mock. Defaults to gpiozero PWMLED.
+        """
         config = config or LedConfig()
         logger.setLevel(logging.DEBUG if debug else logging.INFO)
         super().__init__(service_name, config, debug)
@@ -15,34 +27,53 @@ class LedOutput(BaseOutput):
         self.red = None
         self.green = None
         self.blue = None
+        self.pwm_factory = pwm_factory
+        # Replaced by the shared scheduler and waveform engine of the OutputController
+        self.effect_scheduler = EffectScheduler()
+        self.waveform_engine = WaveformEngine()
 
     def setup(self):
         logger.info(f"Setting up {self.service_name}")
-        self.red = PWMLED(self.config.r_pin)
-        self.green = PWMLED(self.config.g_pin)
-        self.blue = PWMLED(self.config.b_pin)
+        if self.pwm_factory is None:
+            from gpiozero import PWMLED
+            self.pwm_factory = PWMLED
+
+        self.red = self.pwm_factory(self.config.r_pin)
+        self.green = self.pwm_factory(self.config.g_pin)
+        self.blue = self.pwm_factory(self.config.b_pin)
 
         self._set_color(r = 0, g = 0, b = 0)
+        self.waveform_engine.register(self.service_name, apply = lambda color: self._set_color(*color), value = (0, 0, 0))
+        self.effect_scheduler.register(self.service_name, apply = self._fade_to, rest = (0, 0, 0))
 
-    def loop(self):
+    async def async_loop(self):
         """
         Process the incoming queue.
         """
 
-        message = self.receive_message(queue=self.incoming_queue, block=True, timeout=None)
-        data = message.data
+        messages = await self.receive_messages_async(queue=self.incoming_queue)
+
+        # Only the latest distance of a batch is shown
+        commands = [(message.data, message.metadata or {}) for message in messages if isinstance(message.data, dict) and "distance" in message.data and "threshold" in message.data]
         
-        logger.info(f"LedOutput | Habe eine Nachricht empfangen: {message}")
-        if isinstance(data, dict) and "distance" in data and "threshold" in data:
+        logger.info(f"LedOutput | Habe {len(messages)} Nachrichten empfangen: {messages[-1]}")
+        for message in messages:
+            message.release()
+
+        if commands and commands[-1][1].get("event") == PresenceEventEnum.Leave:
+            # Nobody is in front of the sensor anymore, the LED fades out at once
+            self.effect_scheduler.cancel(self.service_name)
+        elif commands:
+            data = commands[-1][0]
             distance = data["distance"]
             threshold = data["threshold"]
             duration = data.get("time", 1)
 
             r, g, b = self._calculate_led_color(distance_cm = distance, threshold = threshold)
             
-            self._set_color(r=r, g=g, b=b)
-            sleep(duration)
-            self._set_color(r = 0, g = 0, b = 0)
+            
+            # The colour follows the latest distance at once, continuous proximity keeps the LED on
+            self.effect_scheduler.schedule(self.service_name, (r, g, b), duration, mode = EffectModeEnum.Extend)
 
             """ for test_distance in range(0, threshold + 1, 10):  
                  print(f"Distance: {test_distance} cm → Color: {self._calculate_led_color(test_distance, threshold)}") """
@@ -55,6 +86,8 @@ class LedOutput(BaseOutput):
         """Clean up the led resources properly before shutdown."""
 
         logger.info(f"Cleaning up {self.service_name}")
+        self.effect_scheduler.unregister(self.service_name)
+        self.waveform_engine.unregister(self.service_name)
         self._set_color(0, 0, 0)
         
         if self.red:
@@ -70,6 +103,9 @@ class LedOutput(BaseOutput):
 
         
 
+    def _fade_to(self, color):
+        self.waveform_engine.play(self.service_name, WaveformEnum.Fade, self.config.fade_time, target = color)
+
     def _set_color(self, r, g, b):
         """ Set the RGB LED color with values from 0 (off) to 1 (full brightness). """
         self.red.value = r
@@ -1,35 +1,54 @@
 import logging
 from outputs.BaseOutput import BaseOutput
+from utils.AsyncService import AsyncService
 from dataclass.VibrationMotorConfig import VibrationMotorConfig
-from gpiozero import PWMOutputDevice
-from time import sleep
+from enums.TopicEnum import TopicEnum
+from enums.EffectModeEnum import EffectModeEnum
+from enums.WaveformEnum import WaveformEnum
+from utils.EffectScheduler import EffectScheduler
+from utils.WaveformEngine import WaveformEngine
 
 logger = logging.getLogger(__name__)
 
-class VibrationMotorOutput(BaseOutput):
-    def __init__(self, service_name, config:VibrationMotorConfig=None, debug=False):
+class VibrationMotorOutput(AsyncService, BaseOutput):
+    topics = (TopicEnum.Haptic,)
+
+    def __init__(self, service_name, config:VibrationMotorConfig=None, debug=False, pwm_factory=None):
+        """
+        :param pwm_factory: Optional function that creates a PWM device for a pin, e.g. a mock. Defaults to gpiozero PWMOutputDevice.
+        """
         config = config or VibrationMotorConfig()
         logger.setLevel(logging.DEBUG if debug else logging.INFO)
         super().__init__(service_name, config, debug)
         self.config = config
         self.motor = None
+        self.pwm_factory = pwm_factory
+        # Replaced by the shared scheduler and waveform engine of the OutputController
+        self.effect_scheduler = EffectScheduler()
+        self.waveform_engine = WaveformEngine()
 
     def setup(self):
         logger.info("Setting up vibration motor.")
-        self.motor = PWMOutputDevice(self.config.in_pin)
+        if self.pwm_factory is None:
+            from gpiozero import PWMOutputDevice
+            self.pwm_factory = PWMOutputDevice
 
-    def loop(self):
+        self.motor = self.pwm_factory(self.config.in_pin)
+        self.waveform_engine.register(self.service_name, apply = self._set_value, value = 0)
+        self.effect_scheduler.register(self.service_name, apply = self._ramp_to, rest = 0, blend = max)
+
+    async def async_loop(self):
         """
         Process the incoming queue.
         """
-        message = self.receive_message(queue=self.incoming_queue, block=True, timeout=None)
-        data = message.data
+        messages = await self.receive_messages_async(queue=self.incoming_queue)
+        commands = [message.data for message in messages if isinstance(message.data, dict) and message.data.get("time") and message.data.get("pwm")]
+        for message in messages:
+            message.release()
         
-        if isinstance(data, dict):
-            if data.get("time") and data.get("pwm"): 
-                self.motor.value = data["pwm"]
-                sleep(data["time"])
-                self.motor.value = 0
+        # Commands that arrive while a vibration plays are blended into it with the strongest value and the latest end
+        for data in commands:
+            self.effect_scheduler.schedule(self.service_name, data["pwm"], data["time"], mode = EffectModeEnum.Blend)
 
 
     def trigger_action(self, data):
@@ -40,7 +59,15 @@ class VibrationMotorOutput(BaseOutput):
 
         logger.info(f"Cleaning up {self.service_name}")
 
+        self.effect_scheduler.unregister(self.service_name)
+        self.waveform_engine.unregister(self.service_name)
         if self.motor:
             self.motor.value = 0
             self.motor.close()
-            logger.info("Motor has been turned off and cleaned up.")
\ No newline at end of file
+            logger.info("Motor has been turned off and cleaned up.")
+
+    def _ramp_to(self, value):
+        self.waveform_engine.play(self.service_name, WaveformEnum.Ramp, self.config.ramp_time, target = value)
+
+    def _set_value(self, value):
+        self.motor.value = value
@@ -1,22 +1,28 @@
 import cv2
+import numpy as np
 import os
 import time
 import logging
-from picamera2 import Picamera2
 from sensors.BaseSensor import BaseSensor
+from utils.AsyncService import AsyncService
 from dataclass.FaceRecognitionConfig import FaceRecognitionConfig
-from enums.ServicesEnum import ServicesEnum
+from enums.TopicEnum import TopicEnum
+from utils.Camera import Camera
+from utils.FaceDetectionPipeline import FaceDetectionPipeline
+from utils.FaceDetectionProcess import FaceDetectionProcess
+from utils.FrameRingBuffer import FrameRingBuffer
 
 logger = logging.getLogger(__name__)
 
-class FaceRecognition(BaseSensor):
+class FaceRecognition(AsyncService, BaseSensor):
     def __init__(self,
                  service_name = "FaceRecognitionService",
                  cascade_path = "config/haarcascade_frontalface_default.xml",
                  debug_output_dir = "logs/detected_faces",
                  debug = False,
                  config: FaceRecognitionConfig = None,
-                 show_camera = False):
+                 show_camera = False,
+                 camera = None):
         config = config or FaceRecognitionConfig()
         super().__init__(service_name = service_name, config = config, debug = debug)
         logger.setLevel(logging.DEBUG if debug else logging.INFO)
@@ -24,100 +30,98 @@ class FaceRecognition(BaseSensor):
         self.debug_output_dir = debug_output_dir
         self.cascade_path = cascade_path 
         self.show_camera = show_camera
+        self.camera: Camera = camera
+        self.pipeline: FaceDetectionPipeline = None
+        self.detection_process: FaceDetectionProcess = None
+        self.frames: FrameRingBuffer = None
+        self.gray = None
         
     def setup(self):
-        # Suppress Picamera2 logs
-        picamera_logger = logging.getLogger("picamera2")
-        picamera_logger.setLevel(logging.WARNING)
-
-        self.face_tracks = {}
-        self.track_id = 0
-        self.frame_count_to_forget = 30
         os.makedirs(self.debug_output_dir, exist_ok=True)
-        self.camera = Picamera2()
-        self.camera.configure(
-            self.camera.create_preview_configuration(
-                main={
-                    "size": (640, 480)
-                }
-            )
-        )
-        self.camera.start()
-        self.face_detector = cv2.CascadeClassifier(self.cascade_path)
-        logger.info("Camera and face detector initialized")
-
-    def loop(self):
-        frame = self.camera.capture_array()
 
-        self._update_face_tracks(frame)
+        if self.config.use_process:
+            self.detection_process = FaceDetectionProcess(self.config, self.cascade_path, capture_frames = self.show_camera)
+            self.detection_process.start()
+        else:
+            # A camera can be passed in, e.g. a simulated one, otherwise the Pi camera is used
+            self.camera = self.camera or Camera(self.config.frame_size, lores_size = self.config.lores_size())
+            self.frames = FrameRingBuffer(self.camera.frame_shape, slots = self.config.ring_slots)
+            self.gray = np.empty(self.camera.lores_shape, dtype=np.uint8) if self.camera.lores_shape else None
+            self.camera.start()
+            self.pipeline = FaceDetectionPipeline(self.config, self.cascade_path)
+            logger.info("Camera and face detector initialized")
+
+    async def async_loop(self):
+        # Capturing and detecting is CPU heavy, it runs in the executor while the event loop keeps serving other services
+        if await self.run_blocking(self._detect_faces):
+            self._send_restoration()
+            await self.sleep(self.config.restoration_duration * 0.9)
+
+    def _detect_faces(self):
+        """
+        Capture the next frame and detect the faces in it.
+        :return: True if a face was detected.
+        """
+        if self.detection_process:
+            # The detection runs in the worker process, waiting for its result is idle time of this service
+            with self.waiting():
+                result = self.detection_process.get_latest_result(timeout=1)
+            if result is None:
+                return False
+            frame_index, detected_faces, tracks = result
+            frame = self.detection_process.frame(frame_index) if self.show_camera else None
+        else:
+            # The full frame is only copied out of the camera buffer if it is displayed or there is no lores stream
+            frame = self.frames.next() if self.show_camera or self.gray is None else None
+            # Capturing blocks until the camera delivers the next frame
+            with self.waiting():
+                self.camera.capture_into(frame, self.gray)
+            if frame is not None:
+                self.frames.commit()
+            detected_faces, tracks = self.pipeline.process(frame, self.gray)
+
+        self._update_face_tracks(frame, detected_faces, tracks)
         if self.show_camera:
             cv2.imshow("Camera", cv2.cvtColor(frame, cv2.COLOR_RGB2BGR))
             cv2.waitKey(3)
+        return len(detected_faces) > 0
 
     def cleanup(self):
+        if self.detection_process:
+            self.detection_process.stop()
+            logger.info("Face detection worker process stopped")
         if self.camera:
             self.camera.stop()
             logger.info("Camera stopped and resources released")
 
-    def _update_face_tracks(self, frame):
-        small_frame = cv2.resize(frame, (0, 0), fx=self.config.downscale_factor, fy=self.config.downscale_factor)
-
-        gray = cv2.cvtColor(small_frame, cv2.COLOR_BGR2GRAY)
-        gray = cv2.equalizeHist(gray)
-
-        detected_faces = self.face_detector.detectMultiScale(gray, 
-                                                             scaleFactor = self.config.scale_factor, 
-                                                             minNeighbors = self.config.min_neighbors, 
-                                                             minSize = self.config.min_size
-                                                            )
-
-        updated_tracks = {}
-        for (x, y, w, h) in detected_faces:
-            # Scale the bounding box back to the original resolution
-            x, y, w, h = int(x / self.config.downscale_factor), int(y / self.config.downscale_factor), int(w / self.config.downscale_factor), int(h / self.config.downscale_factor)
-            cx, cy = x + w // 2, y + h //2
-            matched_id = None
-
-            for fid, (fx, fy, fw, fh, last_seen) in self.face_tracks.items():
-                if abs(fx + fw // 2 - cx) < w and abs(fy + fh // 2 - cy) < h:
-                    matched_id = fid
-                    updated_tracks[fid] = (x, y, w, h, 0)
-                    break
-            
-            if matched_id is None:
-                updated_tracks[self.track_id] = (x, y, w, h, 0)
-                matched_id = self.track_id
-                self.track_id += 1
-
-                if self.show_camera:
+    def _update_face_tracks(self, frame, detected_faces, tracks):
+        """
+        Handle the detection results of one frame.
+        :param frame: The camera frame, only needed if show_camera is enabled.
+        :param detected_faces: List of detected (x, y, w, h) in the coordinates of the camera frame.
+        :param tracks: List of (track id, box, is_new) for every detected face.
+        """
+        if self.show_camera:
+            for track_id, (x, y, w, h), is_new in tracks:
+                if is_new:
                     timestamp = int(time.time())
-                    filename = os.path.join(self.debug_output_dir, f"face_{matched_id}_{timestamp}.jpg")
+                    filename = os.path.join(self.debug_output_dir, f"face_{track_id}_{timestamp}.jpg")
                     cv2.imwrite(filename, frame[y:y + h, x:x + w])
-            
-            if self.show_camera:
+                
                 cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
-                cv2.putText(frame, f"ID {matched_id}", (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 0), 2)
-
-
-        for fid, (fx, fy, fw, fh, last_seen) in self.face_tracks.items():
-            if fid not in updated_tracks:
-                updated_tracks[fid] = (fx, fy, fw, fh, last_seen + 1)
-
-        self.face_tracks = {
-            fid: data for fid, data in updated_tracks.items() if data[4] < self.frame_count_to_forget
-        }
+                cv2.putText(frame, f"ID {track_id}", (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 0), 2)
 
         if len(detected_faces) > 0:
             logger.debug(f"Face detected: {detected_faces}")
 
-            self.send_message(service_name = self.service_name,
-                                data = {
-                                    "time": self.config.restoration_duration,
-                                    "level_steps": self.config.level_steps,
-                                },
-                                queue=self.outgoing_queue,
-                                metadata={
-                                    "stage": self.config.stage,
-                                },
-                                target_output = ServicesEnum.ImageDisplayOutput)
-            time.sleep(self.config.restoration_duration * 0.9)
+    def _send_restoration(self):
+        self.send_message(service_name = self.service_name,
+                            data = {
+                                "time": self.config.restoration_duration,
+                                "level_steps": self.config.level_steps,
+                            },
+                            queue=self.outgoing_queue,
+                            metadata={
+                                "stage": self.config.stage,
+                            },
+                            topic = TopicEnum.Restoration)
@@ -1,14 +1,18 @@
+import asyncio
 import logging
 import time
-from evdev import InputDevice, ecodes, list_devices
 from sensors.BaseSensor import BaseSensor
+from utils.AsyncService import AsyncService
 from dataclass.TouchConfig import TouchConfig
-from enums.ServicesEnum import ServicesEnum
+from enums.TopicEnum import TopicEnum
+from enums.PriorityEnum import PriorityEnum
+from utils.GestureAggregator import GestureAggregator
+from utils import InputCodes as ecodes
 
 logger = logging.getLogger(__name__)
 
-class TouchSensor(BaseSensor):
-    def __init__(self, service_name, device_name="QDTECH̐MPI700 MPI7002", config=None, debug=False):
+class TouchSensor(AsyncService, BaseSensor):
+    def __init__(self, service_name, device_name="QDTECH̐MPI700 MPI7002", config=None, debug=False, device=None):
         """
         A sensor for handling touch input events.
 
@@ -16,28 +20,32 @@ class TouchSensor(BaseSensor):
         :param device_name: Name of the touch input device.
         :param config: Optional configuration parameters.
         :param debug: Enables debug mode for detailed logging.
+        :param device: Optional input device to read instead of the evdev device, e.g. a scripted one.
         """
         super().__init__(service_name, config, debug)
         logger.setLevel(logging.DEBUG if debug else logging.INFO)
         self.device_name = device_name
         self.device_path = None
-        self.touch_device = None
+        self.touch_device = device
         self.debug = debug
         self.config: TouchConfig = config or TouchConfig()
+        self.gestures: GestureAggregator = None
+        self._last_swipe_time = 0
+        self._read = None
 
     def setup(self):
         """
         Set up the touch sensor by finding and initializing the input device.
         """
         try:
-            devices = [InputDevice(path) for path in list_devices()]
-            for device in devices:
-                if device.name == self.device_name:
-                    self.device_path = device.path
-                    break
-            
-            if self.device_path:
-                self.touch_device = InputDevice(self.device_path)
+            if not self.touch_device:
+                self.touch_device = self._open_device()
+
+            if self.touch_device:
+                self.device_path = self.touch_device.path
+                x_info = self.touch_device.absinfo(ecodes.ABS_X)
+                y_info = self.touch_device.absinfo(ecodes.ABS_Y)
+                self.gestures = GestureAggregator((x_info.min, x_info.max), (y_info.min, y_info.max), grid_size = self.config.gesture_grid)
                 logger.info(f"Touch device initialized: {self.touch_device.name} at {self.device_path}")
             else:
                 raise FileNotFoundError(f"Device with name '{self.device_name}' not found.")
@@ -49,9 +57,19 @@ class TouchSensor(BaseSensor):
             logger.error(f"Unexpected error during setup: {e}")
             self.stop()
 
-    def loop(self):
+    def _open_device(self):
+        from evdev import InputDevice, list_devices
+
+        for path in list_devices():
+            device = InputDevice(path)
+            if device.name == self.device_name:
+                return device
+            device.close()
+        return None
+
+    async def async_loop(self):
         """
-        Main loop to read and handle touch events.
+        Main loop to read and handle touch events, the device is read without blocking the event loop.
         """
         if not self.touch_device:
             logger.error("Touch device not initialized")
@@ -59,55 +77,74 @@ class TouchSensor(BaseSensor):
             return
         
         try:
-            for event in self.touch_device.read_loop():
-                if event.type == ecodes.EV_ABS:
-                    """ self.send_message(
-                        service_name = self.service_name,
-                        data = {
-                            "amount": 0.01,
-                        },
-                        queue=self.outgoing_queue,
-                        metadata = {
-                            "type": "swipe"
-                        }
-                    ) """
+            # All events that are available are read at once, the gesture is updated at every SYN_REPORT.
+            # While a swipe waits to be sent, the read only waits until the throttle window ends, the read itself stays pending
+            if self._read is None:
+                self._read = asyncio.ensure_future(self.touch_device.async_read())
+            with self.waiting():
+                done, _ = await asyncio.wait({self._read}, timeout = self._get_swipe_timeout())
+            events = []
+            if done:
+                events, self._read = self._read.result(), None
+            for event in events:
+                if event.type == ecodes.EV_KEY and event.code == ecodes.BTN_TOUCH and event.value == 1:
+                    logger.debug("Touch down")
+                    self.send_message(service_name = self.service_name,
+                                    data = {
+                                        "time": self.config.restoration_duration,
+                                        "level_steps": self.config.level_steps
+                                    },
+                                    queue=self.outgoing_queue,
+                                    metadata = {
+                                        "stage": self.config.stage,
+                                    },
+                                    topic = TopicEnum.Restoration,
+                                    priority = PriorityEnum.Urgent)
+                self.gestures.handle(event)
 
-                    """ 
-                    TODO: Die idee ist das wir nicht jeden einzelnen swipe als event schicken sondern nur zwei: einmal "Touch down" und "Touch Up". Beim
-                    Touch Down soll sich der Overlay anfangen abzubauen und sobald Touch Up kommt wird dieser Prozess angehalten
-                    """
-                        
-                    if event.code == ecodes.ABS_X:
-                        #logger.debug(f"X Position: {event.value}")
-                        # TODO: Hier muss eine Message gesendet werden, die dazu dient die overlay opacity zu regulieren
-                        pass
-                    elif event.code == ecodes.ABS_Y:
-                        # logger.debug(f"Y Position: {event.value}")
-                        # TODO: Hier muss eine Message gesendet werden, die dazu dient die overlay opacity zu regulieren
-                        pass
-                        
-                elif event.type == ecodes.EV_KEY and event.code == ecodes.BTN_TOUCH:
-                    if event.value == 1:
-                        logger.debug("Touch down")
-                        self.send_message(service_name = self.service_name,
-                                        data = {
-                                            "time": self.config.restoration_duration,
-                                            "level_steps": self.config.level_steps
-                                        },
-                                        queue=self.outgoing_queue,
-                                        metadata = {
-                                            "stage": self.config.stage,
-                                        },
-                                        target_output = ServicesEnum.ImageDisplayOutput)
-                        
-                    elif event.value == 0:
-                        # logger.debug("Touch up")
-                        pass
+            # Swipes are sent at most at the display frame rate, the end of a touch is sent at once
+            now = time.monotonic()
+            if now - self._last_swipe_time >= 1.0 / self.config.swipe_update_rate or not self.gestures.touching:
+                gesture = self.gestures.flush()
+                if gesture:
+                    self._send_swipe(gesture)
+                    self._last_swipe_time = now
                          
+        except asyncio.CancelledError:
+            if self._read is not None:
+                self._read.cancel()
+                self._read = None
+            raise
         except Exception as e:
             logger.error(f"Error in touch sensor loop: {e}")
             self.stop()
 
+    def _get_swipe_timeout(self):
+        """
+        Time until the movement collected in the current throttle window has to be sent, None if there is none.
+        """
+        if not self.gestures.has_movement:
+            return None
+        return max(0, self._last_swipe_time + 1.0 / self.config.swipe_update_rate - time.monotonic())
+
+    def _send_swipe(self, gesture):
+        """
+        Send the amount of dust a swipe wipes away. Faster swipes wipe more of the area they cover.
+        """
+        speed = min(2.0, max(0.5, gesture["velocity"] / self.config.swipe_reference_velocity))
+        self.send_message(service_name = self.service_name,
+                        data = {
+                            "amount": self.config.swipe_gain * gesture["coverage"] * speed,
+                            **gesture
+                        },
+                        queue=self.outgoing_queue,
+                        metadata = {
+                            "type": "swipe"
+                        },
+                        topic = TopicEnum.Gesture,
+                        priority = PriorityEnum.High,
+                        block = False)
+
     def cleanup(self):
         """
         Clean up the touch sensor by releasing resources.
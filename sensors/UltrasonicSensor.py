@@ -1,65 +1,103 @@
 import logging
 import time
-from gpiozero import DistanceSensor
 from sensors.BaseSensor import BaseSensor
+from utils.AsyncService import AsyncService
 from dataclass.UltrasonicConfig import UltrasonicConfig
-from enums.ServicesEnum import ServicesEnum
+from enums.TopicEnum import TopicEnum
+from enums.PriorityEnum import PriorityEnum
+from enums.PresenceEventEnum import PresenceEventEnum
+from utils.MessagePool import MessagePool
+from utils.DistanceFilter import DistanceFilter
+from utils.PresenceDetector import PresenceDetector
 
 logger = logging.getLogger(__name__)
 
-class UltrasonicSensor(BaseSensor):
+class UltrasonicSensor(AsyncService, BaseSensor):
     def __init__(self, 
                  service_name = "DistanceSensor", 
                  debug = False,
-                 config: UltrasonicConfig = None):
+                 config: UltrasonicConfig = None,
+                 sensor = None):
         config = config or UltrasonicConfig()
         super().__init__(service_name, config, debug)
         logger.setLevel(logging.DEBUG if debug else logging.INFO)
         self.config = config
-        self.sensor = DistanceSensor(
-            echo = config.echo_pin,
-            trigger = config.trigger_pin,
-            max_distance = config.max_distance,
+        self.message_pool = MessagePool()
+        # A sensor can be passed in, e.g. a scripted one, it only needs a distance in meters and close()
+        self.sensor = sensor
+        self.filter = DistanceFilter(window = config.filter_window, alpha = config.filter_alpha)
+        self.presence = PresenceDetector(threshold = config.threshold, hysteresis = config.hysteresis)
+        self._last_sent_distance = None
+        self._last_refresh_time = 0
+    
+    def _open_sensor(self):
+        from gpiozero import DistanceSensor
+
+        return DistanceSensor(
+            echo = self.config.echo_pin,
+            trigger = self.config.trigger_pin,
+            max_distance = self.config.max_distance,
             queue_len=1
         )
-        self.last_measured_distance = self.config.max_distance
-    
+
     def setup(self):
-        pass
+        if self.sensor is None:
+            self.sensor = self._open_sensor()
 
-    def loop(self):
+    async def async_loop(self):
+        """
+        Sample the distance continuously and only send a message when someone enters, moves, stays or leaves.
+        """
         try:
             distance = self.sensor.distance
-            if distance is not None and distance != self.last_measured_distance and abs(distance - self.last_measured_distance) <= 5:
-                self.last_measured_distance = distance
-                distance_cm = int(distance * 100)
-
-                if distance_cm < self.config.threshold: 
-                    logger.debug(f"Distance: {distance_cm} cm | Strength: {self.config.level_steps} | Duration: {self.config.restoration_duration}")
-
-                    self.send_message(service_name = self.service_name,
-                                        data = {
-                                            "time": self.config.restoration_duration,
-                                            "level_steps": self.config.level_steps
-                                        },
-                                        queue=self.outgoing_queue,
-                                        target_output = ServicesEnum.ImageDisplayOutput,
-                                        block=False)
-                    logger.debug("UltrasoniceSensor |Sende jetzt eine Nachricht an LedOutput ")
-                    self.send_message(service_name = self.service_name,
-                                        data = {
-                                            "time": self.config.restoration_duration,
-                                            "distance": distance_cm,
-                                            "threshold": self.config.threshold
-                                        },
-                                        queue=self.outgoing_queue,
-                                        target_output = ServicesEnum.LedOutput,
-                                        block=False)
-                    time.sleep(self.config.restoration_duration * 0.7)
-            time.sleep(self.config.loop_refresh_rate)
+            if distance is not None:
+                self._handle_distance(self.filter.update(distance * 100), time.monotonic())
             
         except Exception as e:
             logger.error(f"Error reading distance: {e}")
+
+        await self.sleep(self.config.loop_refresh_rate)
+
+    def _handle_distance(self, distance_cm, now):
+        """
+        Turn a filtered distance into presence messages.
+        Enter and the periodic refresh while someone stays request a restoration, updates only report a new distance.
+        """
+        event = self.presence.update(distance_cm)
+        if event == PresenceEventEnum.Enter:
+            self._send_presence(event, distance_cm, restoration = True, priority = PriorityEnum.Normal)
+            self._last_refresh_time = now
+        elif event == PresenceEventEnum.Leave:
+            self._send_presence(event, distance_cm, restoration = False, priority = PriorityEnum.Normal)
+        elif self.presence.present:
+            if now - self._last_refresh_time >= self.config.restoration_duration * self.config.refresh_factor:
+                self._send_presence(PresenceEventEnum.Update, distance_cm, restoration = True)
+                self._last_refresh_time = now
+            elif abs(distance_cm - self._last_sent_distance) >= self.config.update_distance:
+                self._send_presence(PresenceEventEnum.Update, distance_cm, restoration = False)
+
+    def _send_presence(self, event, distance_cm, restoration, priority = PriorityEnum.Low):
+        logger.debug(f"{event.value} - Distance: {int(distance_cm)} cm | Strength: {self.config.level_steps} | Duration: {self.config.restoration_duration}")
+        self._last_sent_distance = distance_cm
+
+        data = {
+            "distance": int(distance_cm),
+            "threshold": self.config.threshold
+        }
+        if restoration:
+            data["time"] = self.config.restoration_duration
+            data["level_steps"] = self.config.level_steps
+
+        self.send_message(service_name = self.service_name,
+                            data = data,
+                            queue=self.outgoing_queue,
+                            metadata = {
+                                "event": event
+                            },
+                            topic = TopicEnum.Proximity,
+                            priority = priority,
+                            block=False)
        
     def cleanup(self):
-        self.sensor.close()
\ No newline at end of file
+        if self.sensor:
+            self.sensor.close()
\ No newline at end of file
@@ -0,0 +1,23 @@
+class MockPWM:
+    def __init__(self, pin):
+        """
+        Replacement for gpiozero PWM devices that records the values it is set to.
+        :param pin: The GPIO pin the device would be connected to.
+        """
+        self.pin = pin
+        self.changes = 0
+        self.closed = False
+        self._value = 0
+
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        if value != self._value:
+            self.changes += 1
+        self._value = value
+
+    def close(self):
+        self.closed = True
@@ -0,0 +1,58 @@
+import random
+import time
+
+# (duration in seconds, distance at the start in meters, distance at the end in meters)
+DEFAULT_SCRIPT = [
+    (3.0, 2.0, 2.0),
+    (2.0, 2.0, 0.3),
+    (4.0, 0.3, 0.3),
+    (2.0, 0.3, 2.0),
+]
+
+class ScriptedDistanceSensor:
+    def __init__(self, script = None, noise = 0.01, outlier_rate = 0.02, max_distance = 5.0, repeat = True, seed = None):
+        """
+        Replacement for gpiozero.DistanceSensor that follows a script of linear distance segments.
+        Readings get gaussian noise and occasional outliers at the maximum distance, like missed echoes.
+        :param script: List of (duration in seconds, start distance, end distance) in meters.
+        :param noise: Standard deviation of the noise in meters.
+        :param outlier_rate: Share of readings that are outliers (0-1).
+        :param max_distance: Maximum distance in meters.
+        :param repeat: Start the script over at its end.
+        """
+        self.script = script or DEFAULT_SCRIPT
+        self.noise = noise
+        self.outlier_rate = outlier_rate
+        self.max_distance = max_distance
+        self.repeat = repeat
+        self.readings = 0
+        self._random = random.Random(seed)
+        self._start_time = None
+        self._length = sum(duration for duration, _, _ in self.script)
+
+    @property
+    def distance(self):
+        now = time.monotonic()
+        if self._start_time is None:
+            self._start_time = now
+        self.readings += 1
+
+        if self._random.random() < self.outlier_rate:
+            return self.max_distance
+        distance = self.scripted_distance(now - self._start_time) + self._random.gauss(0, self.noise)
+        return min(self.max_distance, max(0.0, distance))
+
+    def scripted_distance(self, elapsed):
+        """
+        Return the distance of the script without noise at a time since the first reading.
+        """
+        if self.repeat:
+            elapsed %= self._length
+        for duration, start, end in self.script:
+            if elapsed < duration:
+                return start + (end - start) * elapsed / duration
+            elapsed -= duration
+        return self.script[-1][2]
+
+    def close(self):
+        pass
@@ -0,0 +1,105 @@
+import asyncio
+import time
+from collections import namedtuple
+from dataclasses import dataclass
+from utils import InputCodes as ecodes
+
+AbsInfo = namedtuple("AbsInfo", ["value", "min", "max", "fuzz", "flat", "resolution"])
+
+# (start x, start y, end x, end y) normalized to the screen, and the duration of the stroke in seconds
+DEFAULT_STROKES = [
+    ((0.1, 0.5), (0.9, 0.5), 0.4),
+    ((0.5, 0.1), (0.5, 0.9), 0.3),
+    ((0.9, 0.9), (0.1, 0.1), 0.5),
+]
+
+@dataclass(slots=True)
+class InputEvent:
+    type: int
+    code: int
+    value: int
+    time: float
+
+    def timestamp(self):
+        return self.time
+
+class ScriptedTouchDevice:
+    name = "Scripted Touch Device"
+    path = "simulation"
+
+    def __init__(self, strokes = None, report_rate = 100, pause = 1.5, size = (1024, 600), repeat = True):
+        """
+        Replacement for an evdev touch device that replays swipe strokes as evdev events.
+        Every stroke is a touch down, a position report per frame at the report rate and a touch up.
+        :param strokes: List of ((start x, start y), (end x, end y), duration in seconds), positions are normalized (0-1).
+        :param report_rate: Touch frames per second.
+        :param pause: Seconds between two strokes.
+        :param size: (width, height) of the absolute axes.
+        :param repeat: Start the strokes over at their end.
+        """
+        self.size = size
+        self.repeat = repeat
+        self.touches = 0
+        self._frames = self._build_frames(strokes or DEFAULT_STROKES, report_rate, pause)
+        self._length = self._frames[-1][0] + pause
+        self._index = 0
+        self._cycle_start = None
+
+    def absinfo(self, code):
+        maximum = self.size[0] - 1 if code == ecodes.ABS_X else self.size[1] - 1
+        return AbsInfo(value = 0, min = 0, max = maximum, fuzz = 0, flat = 0, resolution = 0)
+
+    async def async_read(self):
+        """
+        Wait until the next touch frame is due and return the events of all frames that are due.
+        """
+        if self._cycle_start is None:
+            self._cycle_start = time.monotonic()
+
+        while True:
+            if self._index >= len(self._frames):
+                if not self.repeat:
+                    await asyncio.sleep(3600)
+                    continue
+                self._index = 0
+                self._cycle_start += self._length
+
+            due_time = self._cycle_start + self._frames[self._index][0]
+            now = time.monotonic()
+            if due_time > now:
+                await asyncio.sleep(due_time - now)
+                continue
+
+            events = []
+            while self._index < len(self._frames) and self._cycle_start + self._frames[self._index][0] <= now:
+                offset, frame = self._frames[self._index]
+                events.extend(InputEvent(event_type, code, value, self._cycle_start + offset) for event_type, code, value in frame)
+                self.touches += sum(1 for event_type, code, value in frame if event_type == ecodes.EV_KEY and value == 1)
+                self._index += 1
+            return events
+
+    def close(self):
+        pass
+
+    def _build_frames(self, strokes, report_rate, pause):
+        """
+        Build the timeline of touch frames, every frame ends with SYN_REPORT.
+        :return: List of (offset in seconds, [(type, code, value)]).
+        """
+        frames = []
+        offset = 0.0
+        for (start_x, start_y), (end_x, end_y), duration in strokes:
+            steps = max(1, int(duration * report_rate))
+            for step in range(steps + 1):
+                share = step / steps
+                frame = []
+                if step == 0:
+                    frame.append((ecodes.EV_KEY, ecodes.BTN_TOUCH, 1))
+                frame.append((ecodes.EV_ABS, ecodes.ABS_X, int((start_x + (end_x - start_x) * share) * (self.size[0] - 1))))
+                frame.append((ecodes.EV_ABS, ecodes.ABS_Y, int((start_y + (end_y - start_y) * share) * (self.size[1] - 1))))
+                frame.append((ecodes.EV_SYN, ecodes.SYN_REPORT, 0))
+                frames.append((offset + step / report_rate, frame))
+            offset += duration + 1.0 / report_rate
+            frames.append((offset, [(ecodes.EV_KEY, ecodes.BTN_TOUCH, 0), (ecodes.EV_SYN, ecodes.SYN_REPORT, 0)]))
+            offset += pause
+        return frames
@@ -0,0 +1,84 @@
+import time
+import cv2
+import numpy as np
+
+class SyntheticCamera:
+    def __init__(self, size = (640, 480), lores_size = None, fps = 30, source = None):
+        """
+        Drop-in replacement for utils.Camera without camera hardware. Frames are read from a video or image file,
+        which is looped, or generated as a bright disc moving over a gradient. Capturing blocks until the next frame
+        is due, like a real camera.
+        :param size: (width, height) of the captured frames.
+        :param lores_size: Optional (width, height) of the grayscale frames.
+        :param fps: Frame rate of the camera.
+        :param source: Optional path to a video or image file readable by OpenCV.
+        """
+        self.size = size
+        self.lores_size = lores_size
+        self.fps = fps
+        self.source = source
+        self.frames_captured = 0
+        self._capture = None
+        self._background = None
+        self._image = np.empty((size[1], size[0], 3), dtype=np.uint8)
+        self._next_frame_time = None
+
+    @property
+    def frame_shape(self):
+        return (self.size[1], self.size[0], 4)
+
+    @property
+    def lores_shape(self):
+        if not self.lores_size:
+            return None
+        return (self.lores_size[1], self.lores_size[0])
+
+    def start(self):
+        if self.source:
+            self._capture = cv2.VideoCapture(self.source)
+            if not self._capture.isOpened():
+                raise FileNotFoundError(f"Failed to open video source: {self.source}")
+        else:
+            gradient = np.linspace(40, 120, self.size[0], dtype=np.uint8)
+            self._background = np.repeat(np.tile(gradient, (self.size[1], 1))[:, :, None], 3, axis=2)
+        self._next_frame_time = time.monotonic()
+
+    def capture_into(self, frame = None, gray = None):
+        """
+        Wait for the next frame and copy it into the given buffers.
+        :param frame: Optional buffer with frame_shape for the RGBA frame.
+        :param gray: Optional buffer with lores_shape for the grayscale frame.
+        """
+        now = time.monotonic()
+        if self._next_frame_time > now:
+            time.sleep(self._next_frame_time - now)
+        self._next_frame_time = max(self._next_frame_time + 1.0 / self.fps, time.monotonic() - 1.0 / self.fps)
+
+        image = self._read_image()
+        if frame is not None:
+            cv2.cvtColor(image, cv2.COLOR_BGR2RGBA, dst=frame)
+        if gray is not None:
+            lores = cv2.resize(image, self.lores_size, interpolation=cv2.INTER_AREA) if self.lores_size != self.size else image
+            cv2.cvtColor(lores, cv2.COLOR_BGR2GRAY, dst=gray)
+        self.frames_captured += 1
+
+    def stop(self):
+        if self._capture:
+            self._capture.release()
+            self._capture = None
+
+    def _read_image(self):
+        if self._capture is not None:
+            ok, image = self._capture.read()
+            if not ok:
+                # End of the video, start over
+                self._capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                ok, image = self._capture.read()
+            if ok:
+                return cv2.resize(image, self.size, dst=self._image) if image.shape[1::-1] != tuple(self.size) else image
+
+        np.copyto(self._image, self._background)
+        phase = self.frames_captured / self.fps
+        center = (int(self.size[0] * (0.5 + 0.3 * np.sin(phase))), int(self.size[1] * (0.5 + 0.2 * np.cos(phase * 0.7))))
+        cv2.circle(self._image, center, self.size[1] // 8, (220, 220, 220), -1)
+        return self._image
@@ -0,0 +1,167 @@
+import asyncio
+import logging
+import time
+from abc import abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from utils.ThreadedService import ThreadedService
+
+logger = logging.getLogger(__name__)
+
+class AsyncSignal:
+    def __init__(self, event_loop):
+        """
+        Thread safe set() for an asyncio.Event, used as signal of a BoundedQueue that is read by a coroutine.
+        :param event_loop: The event loop the event is awaited in.
+        """
+        self._event_loop = event_loop
+        self._event = asyncio.Event()
+
+    def set(self):
+        try:
+            self._event_loop.call_soon_threadsafe(self._event.set)
+        except RuntimeError:
+            # The event loop closed, nobody waits for the event anymore
+            pass
+
+    async def wait(self):
+        await self._event.wait()
+        self._event.clear()
+
+class AsyncService(ThreadedService):
+    """
+    A service whose loop is a coroutine. By default it runs in an event loop in its own thread like every
+    ThreadedService, in the asyncio mode of the OutputController all async services share one event loop.
+    """
+    _event_loop: asyncio.AbstractEventLoop = None
+    _task: asyncio.Task = None
+    _future = None
+    _executor: ThreadPoolExecutor = None
+
+    @abstractmethod
+    async def async_loop(self):
+        """
+        One iteration of the service. Waits with await instead of blocking, blocking or CPU heavy work goes through run_blocking().
+        Must be implemented by subclasses.
+        """
+        pass
+
+    def loop(self):
+        """
+        Not used, async_loop() runs in an event loop instead.
+        """
+        pass
+
+    def start(self, event_loop: asyncio.AbstractEventLoop = None):
+        """
+        Start the service in its own thread or, if an event loop is given, as a task on that event loop.
+        """
+        if event_loop is None:
+            super().start()
+            return
+
+        self.prepare()
+        self._is_running = True
+        self._event_loop = event_loop
+        self._future = asyncio.run_coroutine_threadsafe(self._run_async(), event_loop)
+        logger.info(f"Starting {self.service_name} on the shared event loop")
+
+    def stop(self):
+        """
+        Stop the service, cancel its task and clean up resources.
+        """
+        self._stop_event.set()
+        if self._event_loop is not None and self._task is not None:
+            try:
+                self._event_loop.call_soon_threadsafe(self._task.cancel)
+            except RuntimeError:
+                # The event loop closed in the meantime, the task already ended
+                pass
+
+        if self._in_event_loop():
+            # Called by the service itself, it must not wait for its own task
+            return
+
+        try:
+            if self._future is not None:
+                self._future.result(timeout=5)
+            elif self._thread:
+                self._thread.join(timeout=5)
+                if self._thread.is_alive():
+                    logger.warning(f"Thread for {self.service_name} did not finished in time")
+        except KeyboardInterrupt:
+            logger.warning(f"Interrupted while waiting for {self.service_name} to stop")
+        except Exception:
+            pass
+
+        # Work that is still running in the executor must finish before cleanup releases its resources
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+        self.cleanup()
+        self._is_running = False
+        self._is_set_up = False
+        logger.info(f"Stopping {self.service_name}")
+
+    async def run_blocking(self, function, *args):
+        """
+        Run blocking or CPU heavy work in the executor of the service, so the event loop stays responsive.
+        The executor has a single thread, work of one service therefore always runs in the same thread.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=self.service_name)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+    async def receive_messages_async(self, queue = None, max_messages = None):
+        """
+        Wait without blocking the event loop until messages are available and receive all of them.
+        """
+        source_queue = queue or self.incoming_queue
+        if not isinstance(source_queue.signal, AsyncSignal):
+            source_queue.signal = AsyncSignal(asyncio.get_running_loop())
+
+        while True:
+            messages = self.receive_messages(queue=source_queue, max_messages=max_messages)
+            if messages:
+                return messages
+            with self.waiting():
+                await source_queue.signal.wait()
+
+    async def sleep(self, seconds):
+        """
+        asyncio.sleep() that is recorded as wait time of the loop.
+        """
+        with self.waiting():
+            await asyncio.sleep(seconds)
+
+    def _run(self):
+        """
+        Run the coroutine in an event loop of the service thread.
+        """
+        self._event_loop = asyncio.new_event_loop()
+        try:
+            self._event_loop.run_until_complete(self._run_async())
+        finally:
+            self._event_loop.close()
+
+    async def _run_async(self):
+        self._task = asyncio.current_task()
+        logger.info(f"{self.service_name} is running")
+        while not self._stop_event.is_set():
+            start = time.perf_counter_ns()
+            try:
+                await self.async_loop()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Error in {self.service_name}: {e}")
+                # A failing iteration must not starve the other services on a shared event loop
+                await asyncio.sleep(0)
+            self._record_loop(start)
+
+    def _in_event_loop(self):
+        try:
+            return asyncio.get_running_loop() is self._event_loop
+        except RuntimeError:
+            return False
@@ -0,0 +1,145 @@
+from collections import deque
+from queue import Empty
+from enums.PriorityEnum import PriorityEnum
+from enums.QueuePolicyEnum import QueuePolicyEnum
+from enums.TopicEnum import TopicEnum
+from utils.SignalingQueue import SignalingQueue
+
+def message_key(message):
+    """
+    Messages with the same key replace each other in a coalescing queue.
+    A plain update of a sender never replaces a restoration request it sent before, and vice versa.
+    Gestures carry increments that have to add up, they are never coalesced (None).
+    """
+    if message.topic == TopicEnum.Gesture:
+        return None
+    return (message.service, message.target_output, message.topic, message.requests_restoration)
+
+def message_priority(message):
+    return getattr(message, "priority", PriorityEnum.Normal)
+
+class BoundedQueue(SignalingQueue):
+    def __init__(self, maxsize = 0, policy = QueuePolicyEnum.DropOldest, key = message_key, signal = None):
+        """
+        Queue with a capacity limit and a policy for messages that arrive while it is full.
+        Messages are kept in one FIFO lane per PriorityEnum, a message is only returned
+        when all lanes of a higher priority are empty.
+        - DropOldest: Discard the oldest queued message of the lowest priority to make room.
+        - DropNewest: Discard the arriving message, unless a queued message has a lower priority, which is discarded instead.
+        - Block: Block the sender until there is room, like queue.Queue.
+        - Coalesce: Replace a queued message with the same key, otherwise behave like DropOldest.
+        :param maxsize: Maximum number of queued messages, 0 for unbounded.
+        :param policy: The QueuePolicyEnum applied to arriving messages.
+        :param key: Function that returns the coalescing key of a message, None if it must not be coalesced.
+        :param signal: Object with a set() method that is set whenever a message is put.
+        """
+        super().__init__(maxsize, signal)
+        self.policy = policy
+        self.key = key
+        self.dropped = 0
+        self.coalesced = 0
+
+    def put(self, item, block = True, timeout = None):
+        if self.policy is QueuePolicyEnum.Block:
+            return super().put(item, block, timeout)
+
+        with self.mutex:
+            if self.policy is QueuePolicyEnum.Coalesce and self._replace(item):
+                self.coalesced += 1
+                if self.signal is not None:
+                    self.signal.set()
+                return
+
+            if 0 < self.maxsize <= self._qsize():
+                self.dropped += 1
+                if self.policy is QueuePolicyEnum.DropNewest and message_priority(item) >= self._lowest_priority():
+                    return
+                self._drop_lowest()
+
+            self._put(item)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+
+    def count_rejected(self):
+        """
+        Count a message the sender could not put, e.g. because a blocking put timed out, as dropped.
+        """
+        with self.mutex:
+            self.dropped += 1
+
+    def get_batch(self, block = False, timeout = None, max_items = None):
+        """
+        Remove and return all queued messages, ordered by priority, while holding the lock only once.
+        :param block: Wait until at least one message is available.
+        :param timeout: Maximum time to wait in seconds, None waits forever. Raises Empty when it expires.
+        :param max_items: Optional maximum number of messages to return.
+        """
+        with self.not_empty:
+            if block and not self.not_empty.wait_for(self._qsize, timeout):
+                raise Empty
+
+            count = self._qsize() if max_items is None else min(max_items, self._qsize())
+            items = [self._get() for _ in range(count)]
+            if items:
+                self.not_full.notify_all()
+            return items
+
+    def stats(self):
+        with self.mutex:
+            return {
+                "size": self._qsize(),
+                "capacity": self.maxsize,
+                "dropped": self.dropped,
+                "coalesced": self.coalesced,
+                "lanes": {priority.name: len(lane) for priority, lane in zip(PriorityEnum, self.lanes)},
+            }
+
+    # Storage of queue.Queue replaced by priority lanes
+    def _init(self, maxsize):
+        self.lanes = [deque() for _ in PriorityEnum]
+        self._size = 0
+
+    def _qsize(self):
+        return self._size
+
+    def _put(self, item):
+        self.lanes[message_priority(item)].append(item)
+        self._size += 1
+        if self.signal is not None:
+            self.signal.set()
+
+    def _get(self):
+        for lane in self.lanes:
+            if lane:
+                self._size -= 1
+                return lane.popleft()
+        raise IndexError("get from an empty queue")
+
+    def _lowest_priority(self):
+        for priority in reversed(range(len(self.lanes))):
+            if self.lanes[priority]:
+                return priority
+        return None
+
+    def _drop_lowest(self):
+        for lane in reversed(self.lanes):
+            if lane:
+                self._size -= 1
+                lane.popleft()
+                return
+
+    def _replace(self, item):
+        key = self.key(item)
+        if key is None:
+            return False
+        for lane in self.lanes:
+            for index, queued in enumerate(lane):
+                if self.key(queued) != key:
+                    continue
+                if message_priority(queued) == message_priority(item):
+                    lane[index] = item
+                else:
+                    del lane[index]
+                    self.lanes[message_priority(item)].append(item)
+                return True
+        return False
@@ -0,0 +1,75 @@
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class Camera:
+    def __init__(self, size = (640, 480), lores_size = None):
+        """
+        Thin wrapper around Picamera2 that captures frames of a fixed size into preallocated buffers.
+        :param size: (width, height) of the captured frames.
+        :param lores_size: Optional (width, height) of an additional low resolution YUV420 stream,
+                           its luma plane is a ready to use grayscale frame.
+        """
+        self.size = size
+        self.lores_size = lores_size
+        self.camera = None
+        self._mapped_array = None
+
+    @property
+    def frame_shape(self):
+        # Preview configurations capture XBGR8888, i.e. four channels per pixel
+        return (self.size[1], self.size[0], 4)
+
+    @property
+    def lores_shape(self):
+        if not self.lores_size:
+            return None
+        return (self.lores_size[1], self.lores_size[0])
+
+    def start(self):
+        # Picamera2 is only imported when the camera starts, so the module can be used off the Pi, e.g. for frame_shape
+        from picamera2 import Picamera2, MappedArray
+        self._mapped_array = MappedArray
+
+        # Suppress Picamera2 logs
+        picamera_logger = logging.getLogger("picamera2")
+        picamera_logger.setLevel(logging.WARNING)
+
+        streams = {
+            "main": {
+                "size": self.size
+            }
+        }
+        if self.lores_size:
+            streams["lores"] = {
+                "size": self.lores_size,
+                "format": "YUV420"
+            }
+
+        self.camera = Picamera2()
+        self.camera.configure(self.camera.create_preview_configuration(**streams))
+        self.camera.start()
+
+    def capture_into(self, frame = None, gray = None):
+        """
+        Capture one request and copy its buffers without allocating new arrays.
+        :param frame: Optional buffer with frame_shape for the main stream.
+        :param gray: Optional buffer with lores_shape for the luma plane of the lores stream.
+        """
+        request = self.camera.capture_request()
+        try:
+            if frame is not None:
+                with self._mapped_array(request, "main") as mapped:
+                    np.copyto(frame, mapped.array)
+            if gray is not None:
+                # The YUV420 buffer starts with the full resolution luma plane, rows may be padded to the stride
+                with self._mapped_array(request, "lores") as mapped:
+                    np.copyto(gray, mapped.array[:gray.shape[0], :gray.shape[1]])
+        finally:
+            request.release()
+
+    def stop(self):
+        if self.camera:
+            self.camera.stop()
+            self.camera = None
@@ -0,0 +1,121 @@
+import threading
+import cv2
+import numpy as np
+from enums.StageEnum import Stage
+from utils.Profiler import profiler
+
+class DegradationKernel:
+    MAX_KERNEL_SIZE = 11
+
+    def __init__(self, image, level_limit = 100):
+        """
+        Fused renderer for the degradation stages. The grayscale plane and the fully blurred grayscale plane
+        are computed once, every frame is then rendered in as few passes as possible into an output buffer.
+        :param image: The RGB image in display layout.
+        :param level_limit: The level at which a stage effect is fully applied.
+        """
+        self.image = image
+        self.level_limit = level_limit
+        self.gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+        self.gray_rgb = cv2.cvtColor(self.gray, cv2.COLOR_GRAY2RGB)
+        self.blurred_gray = cv2.GaussianBlur(self.gray, self._kernel_size(level_limit), 0)
+        self._scratch = threading.local()
+        self._brightness_levels = np.arange(256, dtype=np.float32)
+
+    def parameters(self, stage, level):
+        """
+        Combine the effects of all stages up to the given stage into one set of parameters.
+        Every stage builds on the fully applied previous stage.
+        :param stage: The stage whose effect is applied partially.
+        :param level: The level of the stage effect (0 to level_limit).
+        :return: (black white intensity 0-1, blur kernel size or None, brightness factor 0-1)
+        """
+        level = max(0, min(level, self.level_limit))
+        match stage:
+            case Stage.BLACK_WHITE:
+                return (level / self.level_limit) ** 4, None, 1.0  # TODO: Erhöhe den Exponenten um einen noch langsameren Effekt zu haben
+            case Stage.BLURRY:
+                return 1.0, self._kernel_size(level), 1.0
+            case Stage.LIGHTNESS:
+                return 1.0, self._kernel_size(self.level_limit), 1.0 - (level / float(self.level_limit)) ** 10  # TODO: Erhöhe den Exponenten um einen noch langsameren Effekt zu haben
+            case Stage.END:
+                return 1.0, self._kernel_size(self.level_limit), 0.0
+            case _:
+                return 0.0, None, 1.0
+
+    def render(self, stage, level, out = None):
+        """
+        Render the frame for a stage and level.
+        :param stage: The stage whose effect is applied partially.
+        :param level: The level of the stage effect (0 to level_limit).
+        :param out: Optional preallocated output buffer with the shape of the image.
+        """
+        intensity, kernel_size, brightness = self.parameters(stage, level)
+        if out is None:
+            out = np.empty_like(self.image)
+
+        if intensity < 1.0:
+            # Colour is still visible, every effect runs on all three channels in place
+            with profiler.span(stage, "black_white"):
+                self.blend_black_white(intensity, out)
+            if kernel_size:
+                with profiler.span(stage, "blur"):
+                    cv2.GaussianBlur(out, kernel_size, 0, dst=out)
+            if brightness < 1.0:
+                with profiler.span(stage, "darken"):
+                    cv2.LUT(out, self._brightness_lut(brightness), dst=out)
+            return out
+
+        # Fully black and white, every effect runs on the single grayscale plane which is expanded at the end
+        plane = self.gray
+        if kernel_size == self._kernel_size(self.level_limit):
+            plane = self.blurred_gray
+        elif kernel_size:
+            with profiler.span(stage, "blur"):
+                plane = self.blur(plane, kernel_size)
+        if brightness < 1.0:
+            with profiler.span(stage, "darken"):
+                plane = self.darken(plane, brightness)
+        with profiler.span(stage, "to_rgb"):
+            return cv2.cvtColor(plane, cv2.COLOR_GRAY2RGB, dst=out)
+
+    def blend_black_white(self, intensity, out):
+        """
+        Blend the image with its grayscale version into the output buffer.
+        :param intensity: Share of the grayscale image (0-1).
+        :param out: The output buffer.
+        """
+        return cv2.addWeighted(self.gray_rgb, intensity, self.image, 1 - intensity, 0, dst=out)
+
+    def blur(self, plane, kernel_size):
+        """
+        Blur a grayscale plane into the scratch buffer of the calling thread.
+        """
+        return cv2.GaussianBlur(plane, kernel_size, 0, dst=self._get_scratch("blur"))
+
+    def darken(self, plane, brightness):
+        """
+        Scale the brightness of a grayscale plane with a lookup table into the scratch buffer of the calling thread.
+        For gray pixels this matches scaling the lightness channel in HLS without the colour space round trip.
+        """
+        return cv2.LUT(plane, self._brightness_lut(brightness), dst=self._get_scratch("darken"))
+
+    def _brightness_lut(self, brightness):
+        return np.clip(self._brightness_levels * brightness, 0, 255).astype(np.uint8)
+
+    def _get_scratch(self, name):
+        # Scratch planes are per thread, the display may render while the frame cache warms up
+        scratch = getattr(self._scratch, name, None)
+        if scratch is None:
+            scratch = np.empty_like(self.gray)
+            setattr(self._scratch, name, scratch)
+        return scratch
+
+    def _kernel_size(self, level):
+        scaled_level = int((level / self.level_limit) * (self.MAX_KERNEL_SIZE - 3))
+        kernel_size = 3 + scaled_level
+
+        if kernel_size % 2 == 0:
+            kernel_size += 1
+
+        return (kernel_size, kernel_size)
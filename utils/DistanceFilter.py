@@ -0,0 +1,32 @@
+import numpy as np
+
+class DistanceFilter:
+    def __init__(self, window = 5, alpha = 0.5):
+        """
+        Smooths distance readings with a median over a ring buffer of the latest readings followed by an
+        exponential moving average. The median removes single outliers, the average removes jitter.
+        :param window: Number of readings in the ring buffer.
+        :param alpha: Weight of the newest median in the moving average (0-1], 1 disables the average.
+        """
+        self.alpha = alpha
+        self._readings = np.empty(window, dtype=np.float64)
+        self._index = 0
+        self._count = 0
+        self.value = None
+
+    def update(self, reading):
+        """
+        Add a reading and return the filtered distance.
+        """
+        self._readings[self._index] = reading
+        self._index = (self._index + 1) % len(self._readings)
+        self._count = min(self._count + 1, len(self._readings))
+
+        median = float(np.median(self._readings[:self._count]))
+        self.value = median if self.value is None else self.value + self.alpha * (median - self.value)
+        return self.value
+
+    def reset(self):
+        self._index = 0
+        self._count = 0
+        self.value = None
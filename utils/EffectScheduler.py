@@ -0,0 +1,145 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+from enums.EffectModeEnum import EffectModeEnum
+
+logger = logging.getLogger(__name__)
+
+@dataclass(slots=True)
+class EffectChannel:
+    apply: Callable[[Any], None]
+    rest: Any = 0
+    blend: Callable[[Any, Any], Any] = max
+    value: Any = None
+    end_time: float = 0.0
+    active: bool = False
+
+class EffectScheduler:
+    def __init__(self):
+        """
+        Shared timeline for actuator effects. An effect is applied as soon as it is scheduled and reset to the rest value
+        of its channel when its deadline passes. A single timer thread waits for the earliest deadline of a heap,
+        so the outputs never sleep while an effect plays.
+        """
+        self._channels: dict[str, EffectChannel] = {}
+        self._deadlines = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._running = False
+        self.scheduled = 0
+        self.expired = 0
+
+    def register(self, channel, apply, rest = 0, blend = max):
+        """
+        Register an actuator channel.
+        :param channel: Unique name of the channel.
+        :param apply: Function that sets the actuator to a value.
+        :param rest: Value the actuator is set to when no effect is active.
+        :param blend: Function that combines the active and the new value for EffectModeEnum.Blend.
+        """
+        with self._condition:
+            self._channels[channel] = EffectChannel(apply = apply, rest = rest, blend = blend)
+
+    def unregister(self, channel):
+        """
+        End the active effect of a channel and remove it, e.g. before the actuator is closed.
+        """
+        with self._condition:
+            state = self._channels.pop(channel, None)
+            if state is not None and state.active:
+                self._reset(state)
+
+    def schedule(self, channel, value, duration, mode = EffectModeEnum.Preempt):
+        """
+        Play an effect on a channel.
+        Preempt replaces an active effect, Extend sets the new value and keeps the later deadline,
+        Blend combines both values and keeps the later deadline.
+        :param channel: Name of a registered channel.
+        :param value: The actuator value.
+        :param duration: Duration of the effect in seconds.
+        :param mode: How the effect interacts with an active effect of the channel.
+        """
+        with self._condition:
+            state = self._channels[channel]
+            end_time = time.monotonic() + duration
+            if state.active and mode != EffectModeEnum.Preempt:
+                end_time = max(end_time, state.end_time)
+                if mode == EffectModeEnum.Blend:
+                    value = state.blend(state.value, value)
+
+            state.value = value
+            state.end_time = end_time
+            state.active = True
+            state.apply(value)
+            heapq.heappush(self._deadlines, (end_time, next(self._sequence), channel))
+            self.scheduled += 1
+
+            self._ensure_running()
+            self._condition.notify()
+
+    def cancel(self, channel):
+        """
+        End the active effect of a channel at once.
+        """
+        with self._condition:
+            state = self._channels.get(channel)
+            if state is not None:
+                self._reset(state)
+
+    def active_value(self, channel):
+        """
+        Return the value of the active effect of a channel or None.
+        """
+        with self._condition:
+            state = self._channels.get(channel)
+            return state.value if state is not None and state.active else None
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._thread:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def stats(self):
+        with self._condition:
+            return {
+                "scheduled": self.scheduled,
+                "expired": self.expired,
+                "pending": len(self._deadlines),
+            }
+
+    def _ensure_running(self):
+        if not self._running:
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name="Effect Scheduler", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        with self._condition:
+            while self._running:
+                now = time.monotonic()
+                while self._deadlines and self._deadlines[0][0] <= now:
+                    _, _, channel = heapq.heappop(self._deadlines)
+                    state = self._channels.get(channel)
+                    # Deadlines of preempted or extended effects and of removed channels are outdated and skipped
+                    if state is not None and state.active and state.end_time <= now:
+                        self._reset(state)
+                        self.expired += 1
+
+                timeout = self._deadlines[0][0] - now if self._deadlines else None
+                self._condition.wait(timeout)
+
+    def _reset(self, state: EffectChannel):
+        state.active = False
+        state.value = None
+        try:
+            state.apply(state.rest)
+        except Exception as e:
+            logger.error(f"Failed to reset effect channel: {e}")
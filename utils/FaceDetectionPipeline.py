@@ -0,0 +1,120 @@
+import time
+import cv2
+import numpy as np
+from dataclass.FaceRecognitionConfig import FaceRecognitionConfig
+from utils.FaceTracker import FaceTracker
+from utils.MotionGate import MotionGate
+
+class FaceDetectionPipeline:
+    def __init__(self, config: FaceRecognitionConfig, cascade_path):
+        """
+        Per frame vision pipeline of the face recognition: downscale, motion gate, Haar cascade and tracking.
+        It holds no reference to the messaging, so it can run in the sensor thread or in a worker process.
+        :param config: The FaceRecognitionConfig.
+        :param cascade_path: Path to the Haar cascade file.
+        """
+        self.config = config
+        self.face_detector = cv2.CascadeClassifier(cascade_path)
+        self.motion_gate = MotionGate(
+            learning_rate = config.motion_learning_rate,
+            threshold = config.motion_threshold,
+            min_area = config.motion_min_area
+        ) if config.motion_gate else None
+        self.tracker = FaceTracker(iou_threshold = config.track_iou_threshold, max_missed = config.track_max_missed)
+        self.frame_index = 0
+        self.last_detection_time = 0
+        self._small = None
+        self._gray = None
+
+    def process(self, frame = None, gray = None):
+        """
+        Detect and track the faces of one camera frame.
+        :param frame: The camera frame, only needed if no grayscale frame is given.
+        :param gray: Optional downscaled grayscale frame, e.g. the luma plane of the camera lores stream.
+        :return: (detected faces, tracks) with boxes (x, y, w, h) in the coordinates of the camera frame
+                 and tracks as (track id, box, is_new) for every detected face.
+        """
+        if gray is None:
+            gray = self._downscale_to_gray(frame)
+        detected_faces = self._detect_faces(gray)
+
+        tracks = [
+            (track.id, self._scale_to_frame(track.box), is_new) for track, is_new in self.tracker.update(detected_faces)
+        ]
+        return [self._scale_to_frame(box) for box in detected_faces], tracks
+
+    def _downscale_to_gray(self, frame):
+        """
+        Downscale the frame and convert it to grayscale in reusable scratch buffers.
+        """
+        small_size = (int(frame.shape[1] * self.config.downscale_factor), int(frame.shape[0] * self.config.downscale_factor))
+        if self._small is None or self._small.shape[:2] != (small_size[1], small_size[0]) or self._small.shape[2:] != frame.shape[2:]:
+            self._small = np.empty((small_size[1], small_size[0], *frame.shape[2:]), dtype=frame.dtype)
+            self._gray = np.empty((small_size[1], small_size[0]), dtype=frame.dtype)
+
+        cv2.resize(frame, small_size, dst=self._small)
+        return cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=self._gray)
+
+    def _scale_to_frame(self, box):
+        # Scale the bounding box back to the original resolution
+        return tuple(int(value / self.config.downscale_factor) for value in box)
+
+    def _detect_faces(self, gray):
+        """
+        Detect then track: between full detections every full_detection_interval frames,
+        the detector only searches the expanded regions around known tracks.
+        Full detections run only on frames with motion, restricted to the moving region.
+        A full frame detection is forced after motion_recheck_interval to find faces that stand still.
+        :param gray: The downscaled grayscale frame.
+        :return: List of (x, y, w, h) in the coordinates of the downscaled frame.
+        """
+        motion = self.motion_gate.update(gray) if self.motion_gate else None
+        self.frame_index += 1
+
+        if self.tracker.tracks and self.frame_index % self.config.full_detection_interval:
+            return self._detect_in_regions(gray, [
+                self._expand_region(track.box, gray.shape, self.config.track_roi_margin) for track in self.tracker.tracks
+            ])
+
+        roi = (0, 0, gray.shape[1], gray.shape[0])
+        if self.motion_gate:
+            recheck_due = time.monotonic() - self.last_detection_time >= self.config.motion_recheck_interval
+
+            if not recheck_due:
+                if motion is None:
+                    return []
+                roi = self._expand_region(motion, gray.shape, self.config.motion_roi_margin)
+
+        self.last_detection_time = time.monotonic()
+        return self._detect_in_regions(gray, [roi])
+
+    def _detect_in_regions(self, gray, regions):
+        """
+        Run the face detector on regions of the frame.
+        :param gray: The downscaled grayscale frame.
+        :param regions: List of (x, y, w, h) to search.
+        :return: List of (x, y, w, h) in the coordinates of the downscaled frame.
+        """
+        detected_faces = []
+        for x, y, w, h in regions:
+            if w < self.config.min_size[0] or h < self.config.min_size[1]:
+                continue
+
+            region = cv2.equalizeHist(gray[y:y + h, x:x + w])
+            faces = self.face_detector.detectMultiScale(region, 
+                                                        scaleFactor = self.config.scale_factor, 
+                                                        minNeighbors = self.config.min_neighbors, 
+                                                        minSize = self.config.min_size
+                                                       )
+            detected_faces.extend((fx + x, fy + y, fw, fh) for (fx, fy, fw, fh) in faces)
+        return detected_faces
+
+    def _expand_region(self, region, shape, margin):
+        """
+        Expand a region by a share of its size on every side and clip it to the frame.
+        """
+        x, y, w, h = region
+        margin_x, margin_y = int(w * margin), int(h * margin)
+        x0, y0 = max(0, x - margin_x), max(0, y - margin_y)
+        x1, y1 = min(shape[1], x + w + margin_x), min(shape[0], y + h + margin_y)
+        return (x0, y0, x1 - x0, y1 - y0)
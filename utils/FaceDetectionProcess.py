@@ -0,0 +1,110 @@
+import logging
+import multiprocessing
+from multiprocessing import shared_memory
+from queue import Empty, Full
+import numpy as np
+from dataclass.FaceRecognitionConfig import FaceRecognitionConfig
+from utils.Camera import Camera
+from utils.FaceDetectionPipeline import FaceDetectionPipeline
+from utils.FrameRingBuffer import FrameRingBuffer
+
+logger = logging.getLogger(__name__)
+
+def _run_worker(shm_name, config, cascade_path, capture_frames, results, stop_event):
+    """
+    Entry point of the worker process: capture frames into the shared memory ring and detect faces on them.
+    Only the detection results are sent back through the results queue.
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    camera = Camera(config.frame_size, lores_size = config.lores_size())
+    frames = FrameRingBuffer(camera.frame_shape, slots = config.ring_slots, buffer = shm.buf)
+    gray = np.empty(camera.lores_shape, dtype=np.uint8) if camera.lores_shape else None
+    camera.start()
+    pipeline = FaceDetectionPipeline(config, cascade_path)
+
+    try:
+        while not stop_event.is_set():
+            frame = frames.next() if capture_frames or gray is None else None
+            camera.capture_into(frame, gray)
+            frame_index = frames.commit()
+            detected_faces, tracks = pipeline.process(frame, gray)
+
+            try:
+                results.put_nowait((frame_index, detected_faces, tracks))
+            except Full:
+                pass
+    except KeyboardInterrupt:
+        pass
+    finally:
+        camera.stop()
+        del frames
+        shm.close()
+
+class FaceDetectionProcess:
+    def __init__(self, config: FaceRecognitionConfig, cascade_path, capture_frames = False):
+        """
+        Runs capture and face detection in a separate process, so the cascade does not compete with
+        the rendering for the GIL. Frames are shared through a ring buffer in shared memory instead of being pickled.
+        :param config: The FaceRecognitionConfig, a copy is handed to the worker.
+        :param cascade_path: Path to the Haar cascade file.
+        :param capture_frames: Copy the full camera frames into shared memory even if the lores luma plane is used.
+        """
+        self.config = config
+        self.cascade_path = cascade_path
+        self.capture_frames = capture_frames
+        self.frame_shape = Camera(config.frame_size).frame_shape
+        self._context = multiprocessing.get_context("spawn")
+        self._results = self._context.Queue(maxsize=4)
+        self._stop_event = self._context.Event()
+        self._process = None
+        self._shm = None
+        self._frames = None
+
+    def start(self):
+        self._shm = shared_memory.SharedMemory(create=True, size=FrameRingBuffer.nbytes(self.frame_shape, self.config.ring_slots))
+        self._frames = FrameRingBuffer(self.frame_shape, slots = self.config.ring_slots, buffer = self._shm.buf)
+        self._process = self._context.Process(
+            target=_run_worker,
+            args=(self._shm.name, self.config, self.cascade_path, self.capture_frames, self._results, self._stop_event),
+            name="FaceDetectionProcess",
+            daemon=True
+        )
+        self._process.start()
+        logger.info(f"Face detection worker process started with pid {self._process.pid}")
+
+    def get_latest_result(self, timeout = 1):
+        """
+        Wait for the next detection result and skip results that are already outdated.
+        :return: (frame index, detected faces, tracks) or None if no result arrived within the timeout.
+        """
+        try:
+            result = self._results.get(timeout=timeout)
+        except Empty:
+            return None
+
+        while True:
+            try:
+                result = self._results.get_nowait()
+            except Empty:
+                return result
+
+    def frame(self, frame_index):
+        """
+        Return a copy of a frame in shared memory. The worker overwrites it ring_slots frames later.
+        """
+        return self._frames.frame(frame_index).copy()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._process:
+            self._process.join(timeout=5)
+            if self._process.is_alive():
+                logger.warning("Face detection worker process did not finish in time")
+                self._process.terminate()
+            self._process = None
+
+        if self._shm:
+            self._frames = None
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
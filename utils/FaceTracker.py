@@ -0,0 +1,72 @@
+from dataclass.FaceTrack import FaceTrack
+
+class FaceTracker:
+    def __init__(self, iou_threshold = 0.3, max_missed = 30, duplicate_iou = 0.5):
+        """
+        Associates face detections with known tracks by the overlap (IoU) of their bounding boxes.
+        :param iou_threshold: Minimum IoU of a detection and a track to continue the track.
+        :param max_missed: Number of updates without a matching detection until a track is forgotten.
+        :param duplicate_iou: Detections overlapping an already accepted detection by more than this are dropped.
+        """
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.duplicate_iou = duplicate_iou
+        self.tracks: list[FaceTrack] = []
+        self._next_id = 0
+
+    def update(self, boxes):
+        """
+        Update the tracks with the detections of one frame.
+        :param boxes: List of detected (x, y, w, h).
+        :return: List of (track, is_new) for every accepted detection.
+        """
+        detections = []
+        for box in boxes:
+            if all(self.iou(box, accepted) <= self.duplicate_iou for accepted in detections):
+                detections.append(tuple(int(value) for value in box))
+
+        candidates = sorted(
+            ((self.iou(track.box, box), track_index, box_index)
+             for track_index, track in enumerate(self.tracks)
+             for box_index, box in enumerate(detections)),
+            reverse=True
+        )
+
+        results = []
+        matched_tracks, matched_boxes = set(), set()
+        for overlap, track_index, box_index in candidates:
+            if overlap < self.iou_threshold:
+                break
+            if track_index in matched_tracks or box_index in matched_boxes:
+                continue
+            matched_tracks.add(track_index)
+            matched_boxes.add(box_index)
+            track = self.tracks[track_index]
+            track.x, track.y, track.w, track.h = detections[box_index]
+            track.missed = 0
+            results.append((track, False))
+
+        for track_index, track in enumerate(self.tracks):
+            if track_index not in matched_tracks:
+                track.missed += 1
+        self.tracks = [track for track in self.tracks if track.missed < self.max_missed]
+
+        for box_index, box in enumerate(detections):
+            if box_index not in matched_boxes:
+                track = FaceTrack(self._next_id, *box)
+                self._next_id += 1
+                self.tracks.append(track)
+                results.append((track, True))
+
+        return results
+
+    @staticmethod
+    def iou(a, b):
+        ax, ay, aw, ah = a
+        bx, by, bw, bh = b
+        inter_w = min(ax + aw, bx + bw) - max(ax, bx)
+        inter_h = min(ay + ah, by + bh) - max(ay, by)
+        if inter_w <= 0 or inter_h <= 0:
+            return 0.0
+        intersection = inter_w * inter_h
+        return intersection / float(aw * ah + bw * bh - intersection)
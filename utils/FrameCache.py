@@ -0,0 +1,87 @@
+import threading
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+class FrameCache:
+    def __init__(self, budget_bytes):
+        """
+        LRU cache for rendered frames with a memory budget.
+        :param budget_bytes: Maximum number of bytes the cached frames may occupy. 0 disables caching.
+        """
+        self.budget_bytes = int(budget_bytes)
+        self._frames = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def size(self):
+        return self._size
+
+    def is_full(self, next_frame_bytes = 0):
+        """
+        Check if another frame of the given size would exceed the budget.
+        """
+        return self._size + next_frame_bytes > self.budget_bytes
+
+    def get(self, key, render):
+        """
+        Return the cached frame for the key or render, store and return it.
+        :param key: Hashable key of the frame, e.g. (Stage, level).
+        :param render: Callable without arguments that renders the frame on a cache miss.
+        """
+        with self._lock:
+            frame = self._frames.get(key)
+            if frame is not None:
+                self._frames.move_to_end(key)
+                self.hits += 1
+                return frame
+            self.misses += 1
+
+        # Render outside of the lock so a warm-up thread does not stall the display
+        frame = render()
+        self.put(key, frame)
+        return frame
+
+    def contains(self, key):
+        with self._lock:
+            return key in self._frames
+
+    def put(self, key, frame):
+        """
+        Store a frame and evict the least recently used frames until it fits into the budget.
+        """
+        if frame is None or frame.nbytes > self.budget_bytes:
+            return
+
+        with self._lock:
+            previous = self._frames.pop(key, None)
+            if previous is not None:
+                self._size -= previous.nbytes
+
+            while self._frames and self._size + frame.nbytes > self.budget_bytes:
+                _, evicted = self._frames.popitem(last=False)
+                self._size -= evicted.nbytes
+                self.evictions += 1
+
+            self._frames[key] = frame
+            self._size += frame.nbytes
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+            self._size = 0
+
+    def stats(self):
+        return {
+            "frames": len(self._frames),
+            "bytes": self._size,
+            "budget": self.budget_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,72 @@
+import threading
+import numpy as np
+
+class FrameExchange:
+    def __init__(self, buffer_count = 3, signal = None):
+        """
+        Hands the latest rendered frame from the render thread to the presenter. Only the newest frame is kept,
+        a frame that is replaced before it was taken is dropped instead of queued.
+        :param buffer_count: Number of reusable frame buffers, 3 allows rendering while one frame waits and one is presented.
+        :param signal: Object with a set() method that is set whenever a frame is published.
+        """
+        self.buffer_count = buffer_count
+        self.signal = signal
+        self._buffers = []
+        self._latest = None
+        self._front = None
+        self._lock = threading.Lock()
+        self.published = 0
+        self.dropped = 0
+
+    def allocate(self, shape, dtype = np.uint8):
+        """
+        Allocate the reusable frame buffers.
+        """
+        with self._lock:
+            self._buffers = [np.empty(shape, dtype = dtype) for _ in range(self.buffer_count)]
+            self._latest = None
+            self._front = None
+
+    def acquire(self):
+        """
+        Return a buffer to render into that is neither waiting to be presented nor being presented.
+        """
+        with self._lock:
+            for buffer in self._buffers:
+                if buffer is not self._latest and buffer is not self._front:
+                    return buffer
+        return None
+
+    def publish(self, frame):
+        """
+        Publish a frame, either an acquired buffer or a read-only frame, e.g. from the frame cache.
+        """
+        with self._lock:
+            if self._latest is not None:
+                self.dropped += 1
+            self._latest = frame
+            self.published += 1
+
+        if self.signal is not None:
+            self.signal.set()
+
+    def take(self):
+        """
+        Take the latest published frame for presentation.
+        :return: The frame or None if no new frame was published since the last call.
+        """
+        with self._lock:
+            frame = self._latest
+            if frame is not None:
+                self._front = frame
+                self._latest = None
+            return frame
+
+    def has_frame(self):
+        return self._latest is not None
+
+    def stats(self):
+        return {
+            "published": self.published,
+            "dropped": self.dropped,
+        }
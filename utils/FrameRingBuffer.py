@@ -0,0 +1,47 @@
+import numpy as np
+
+class FrameRingBuffer:
+    def __init__(self, shape, slots = 4, dtype = np.uint8, buffer = None):
+        """
+        Preallocated ring of frames that the capture writes into instead of allocating a new array per frame.
+        :param shape: Shape of one frame.
+        :param slots: Number of frames in the ring. A frame is overwritten after slots further frames.
+        :param dtype: Data type of the frames.
+        :param buffer: Optional buffer to place the frames in, e.g. the buf of a SharedMemory block.
+        """
+        self.shape = tuple(shape)
+        self.slots = slots
+        self.frames = np.ndarray((slots, *self.shape), dtype=dtype, buffer=buffer)
+        self.count = 0
+
+    @staticmethod
+    def nbytes(shape, slots = 4, dtype = np.uint8):
+        return int(np.prod(shape)) * slots * np.dtype(dtype).itemsize
+
+    def next(self):
+        """
+        Return the slot the next frame is written into.
+        """
+        return self.frames[self.count % self.slots]
+
+    def commit(self):
+        """
+        Mark the frame written into the slot of next() as the latest frame.
+        :return: Index of the committed frame.
+        """
+        self.count += 1
+        return self.count - 1
+
+    def latest(self):
+        """
+        Return the latest committed frame or None if no frame was committed yet.
+        """
+        if self.count == 0:
+            return None
+        return self.frames[(self.count - 1) % self.slots]
+
+    def frame(self, frame_index):
+        """
+        Return the slot of a frame by its index, the frame is only valid until slots further frames were written.
+        """
+        return self.frames[frame_index % self.slots]
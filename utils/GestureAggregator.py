@@ -0,0 +1,110 @@
+import math
+import numpy as np
+from utils import InputCodes as ecodes
+
+class GestureAggregator:
+    def __init__(self, x_range, y_range, grid_size = (16, 10)):
+        """
+        Aggregates raw touch events into gestures. Events are buffered until SYN_REPORT, which completes one
+        touch frame, and the frames are accumulated until flush() is called.
+        :param x_range: (min, max) of ABS_X of the device.
+        :param y_range: (min, max) of ABS_Y of the device.
+        :param grid_size: (columns, rows) of the grid the covered area is measured on.
+        """
+        self.x_range = x_range
+        self.y_range = y_range
+        self.touching = False
+        self._grid = np.zeros((grid_size[1], grid_size[0]), dtype=bool)
+        self._pending_x = None
+        self._pending_y = None
+        self._pending_touch = None
+        self._position = None
+        self._last_time = None
+        self._distance = 0.0
+        self._duration = 0.0
+        self._covered = 0
+
+    def handle(self, event):
+        """
+        Feed one evdev event.
+        :return: True if the event completed a touch frame.
+        """
+        if event.type == ecodes.EV_ABS:
+            if event.code == ecodes.ABS_X:
+                self._pending_x = self._normalize(event.value, self.x_range)
+            elif event.code == ecodes.ABS_Y:
+                self._pending_y = self._normalize(event.value, self.y_range)
+        elif event.type == ecodes.EV_KEY and event.code == ecodes.BTN_TOUCH:
+            self._pending_touch = event.value == 1
+        elif event.type == ecodes.EV_SYN and event.code == ecodes.SYN_REPORT:
+            self._commit(event.timestamp())
+            return True
+        return False
+
+    @property
+    def has_movement(self):
+        """
+        True if the touch moved since the last flush.
+        """
+        return self._distance > 0 or self._covered > 0
+
+    def flush(self):
+        """
+        Return the gesture accumulated since the last flush and start a new one.
+        :return: Dictionary with velocity (screen sizes per second), distance (screen sizes) and coverage
+            (share of the screen newly covered, 0-1) or None if the touch did not move.
+        """
+        if self._distance <= 0 and self._covered == 0:
+            return None
+
+        gesture = {
+            "velocity": self._distance / self._duration if self._duration > 0 else 0.0,
+            "distance": self._distance,
+            "coverage": self._covered / self._grid.size,
+        }
+        self._distance = 0.0
+        self._duration = 0.0
+        self._covered = 0
+        return gesture
+
+    def _commit(self, timestamp):
+        if self._pending_touch is True:
+            # A new touch starts on a clean grid, strokes over an area wiped in an earlier touch count again
+            self.touching = True
+            self._grid[:] = False
+            self._position = None
+            self._last_time = None
+
+        if self.touching and (self._pending_x is not None or self._pending_y is not None):
+            # A frame only reports the axes that changed, the other axis keeps its last value
+            previous = self._position
+            x = self._pending_x if self._pending_x is not None else (previous[0] if previous else None)
+            y = self._pending_y if self._pending_y is not None else (previous[1] if previous else None)
+            if x is not None and y is not None:
+                if previous is not None:
+                    self._distance += math.hypot(x - previous[0], y - previous[1])
+                    self._duration += timestamp - self._last_time
+                self._position = (x, y)
+                self._last_time = timestamp
+                self._cover(x, y)
+
+        if self._pending_touch is False:
+            self.touching = False
+            self._position = None
+
+        self._pending_x = None
+        self._pending_y = None
+        self._pending_touch = None
+
+    def _cover(self, x, y):
+        rows, columns = self._grid.shape
+        row = min(rows - 1, int(y * rows))
+        column = min(columns - 1, int(x * columns))
+        if not self._grid[row, column]:
+            self._grid[row, column] = True
+            self._covered += 1
+
+    @staticmethod
+    def _normalize(value, value_range):
+        minimum, maximum = value_range
+        return min(1.0, max(0.0, (value - minimum) / (maximum - minimum))) if maximum > minimum else 0.0
@@ -0,0 +1,52 @@
+import bisect
+import threading
+
+class Histogram:
+    def __init__(self, bounds = None):
+        """
+        Histogram with fixed buckets, recording a value is a binary search and an increment.
+        :param bounds: Ascending upper bounds of the buckets, defaults to exponential buckets from 0.05 to about 6500,
+                       e.g. milliseconds. Larger values are counted in an overflow bucket.
+        """
+        self.bounds = bounds or [0.05 * 2 ** exponent for exponent in range(18)]
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.minimum = None
+        self.maximum = None
+        self._lock = threading.Lock()
+
+    def record(self, value):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.bounds, value)] += 1
+            self.count += 1
+            self.total += value
+            self.minimum = value if self.minimum is None else min(self.minimum, value)
+            self.maximum = value if self.maximum is None else max(self.maximum, value)
+
+    def percentile(self, percent):
+        """
+        Estimate a percentile as the upper bound of the bucket it falls into, capped at the maximum.
+        """
+        with self._lock:
+            if not self.count:
+                return None
+            rank = percent / 100 * self.count
+            seen = 0
+            for index, count in enumerate(self.counts):
+                seen += count
+                if seen >= rank and count:
+                    bound = self.bounds[index] if index < len(self.bounds) else self.maximum
+                    return min(bound, self.maximum)
+            return self.maximum
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "min": self.minimum,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.maximum,
+        }
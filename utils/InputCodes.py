@@ -0,0 +1,15 @@
+"""Linux input event codes used by the touch sensor
+
+The values are part of the kernel ABI and identical to evdev.ecodes, so gestures can be
+aggregated and simulated without evdev being installed.
+"""
+EV_SYN = 0x00
+EV_KEY = 0x01
+EV_ABS = 0x03
+
+SYN_REPORT = 0
+
+BTN_TOUCH = 0x14a
+
+ABS_X = 0x00
+ABS_Y = 0x01
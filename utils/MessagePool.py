@@ -0,0 +1,47 @@
+import threading
+import time
+from collections import deque
+from dataclass.Message import Message
+from enums.PriorityEnum import PriorityEnum
+
+class MessagePool:
+    def __init__(self, size = 32):
+        """
+        Reuses Message instances for high rate producers. Receivers call message.release() when they are done,
+        messages that are dropped or coalesced on the way are simply left to the garbage collector.
+        :param size: Maximum number of free messages kept for reuse.
+        """
+        self._free = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+
+    def acquire(self, service, data, metadata = None, target_output = None, topic = None, priority = PriorityEnum.Normal):
+        with self._lock:
+            message = self._free.pop() if self._free else None
+
+        if message is None:
+            self.created += 1
+            return Message(service = service, data = data, metadata = metadata, target_output = target_output,
+                           topic = topic, priority = priority, pool = self)
+
+        self.reused += 1
+        message.service = service
+        message.data = data
+        message.timestamp = time.monotonic_ns()
+        message.metadata = metadata
+        message.target_output = target_output
+        message.topic = topic
+        message.priority = priority
+        message.references = 1
+        message.trace_id = 0
+        return message
+
+    def release(self, message: Message):
+        with self._lock:
+            message.references -= 1
+            if message.references > 0:
+                return
+            message.data = None
+            message.metadata = None
+            self._free.append(message)
@@ -0,0 +1,118 @@
+import logging
+import threading
+import time
+from queue import Queue
+from dataclass.BaseConfig import BaseConfig
+from dataclass.Message import Message
+from utils.AsyncService import AsyncService
+from enums.TraceHopEnum import TraceHopEnum
+
+logger = logging.getLogger(__name__)
+
+class MessageRouter(AsyncService):
+    def __init__(self, service_name = "Message Router", idle_timeout = 30, debug = False):
+        """
+        Routes published messages directly in the thread of the publisher to the incoming queues of all subscribers.
+        A message is delivered to the subscribers of its topic and of its target output.
+        The own thread only adapts the configs of publishers that stayed idle.
+        :param service_name: Name of the router.
+        :param idle_timeout: Seconds without a message until the restoration strength of a publisher is decreased.
+        :param debug: Enable debugging logs.
+        """
+        super().__init__(service_name, debug)
+        logger.setLevel(logging.DEBUG if debug else logging.INFO)
+        self.idle_timeout = idle_timeout
+        self._subscriptions: dict[object, list[Queue]] = {}
+        self._last_activity = {}
+        self._lock = threading.Lock()
+        self.tracer = None
+
+    def subscribe(self, topic, queue: Queue):
+        """
+        Subscribe a queue to a topic, e.g. a TopicEnum or the ServicesEnum of an output for direct messages.
+        """
+        with self._lock:
+            queues = self._subscriptions.setdefault(topic, [])
+            if queue not in queues:
+                queues.append(queue)
+
+    def register(self, service):
+        """
+        Let a service publish its outgoing messages through the router.
+        """
+        service.router = self
+        with self._lock:
+            self._last_activity[service] = time.monotonic()
+
+    def publish(self, message: Message, publisher = None):
+        """
+        Deliver a message to every queue subscribed to its topic or its target output.
+        """
+        queues = self._subscriptions.get(message.topic, []) if message.topic else []
+        if message.target_output:
+            queues = queues + [queue for queue in self._subscriptions.get(message.target_output, []) if queue not in queues]
+
+        if not queues:
+            logger.warning(f"No subscriber for message from {message.service} - Topic: {message.topic} - Output: {message.target_output}")
+            return
+
+        logger.debug(f"Received message from {message.service}: Data: {message.data}, Metadata: {message.metadata if message.metadata else 'None'}, Topic: {message.topic}, Output: {message.target_output}")
+        if self.tracer is not None and message.trace_id:
+            self.tracer.hop(message.trace_id, TraceHopEnum.Route)
+        if message.pool is not None:
+            # Every receiver releases a pooled message once
+            message.references = len(queues)
+        for queue in queues:
+            queue.put(message)
+
+        # Only restoration requests count as activity, distance updates and leave events do not strengthen the publisher
+        if publisher is not None and message.requests_restoration:
+            self._increase_strength(publisher)
+
+    def setup(self):
+        logger.info(f"{self.service_name} initialized")
+
+    async def async_loop(self):
+        await self.sleep(1)
+
+        now = time.monotonic()
+        with self._lock:
+            idle_services = [service for service, last_activity in self._last_activity.items() if now - last_activity >= self.idle_timeout]
+            for service in idle_services:
+                self._last_activity[service] = now
+
+        for service in idle_services:
+            logger.debug(f"{service.service_name} | No message received within timeout.")
+            self._decrease_strength(service)
+
+    def cleanup(self):
+        logger.info(f"{self.service_name} stopped")
+
+    def _increase_strength(self, service):
+        with self._lock:
+            self._last_activity[service] = time.monotonic()
+            config = service.config
+            if not isinstance(config, BaseConfig):
+                return
+
+            if config.level_steps < config.level_steps_max:
+                logger.debug(f"{service.service_name} | I will increase restoration strength ({config.level_steps}) by {config.level_steps_interval}")
+                config.level_steps += config.level_steps_interval
+
+            if config.restoration_duration < config.restoration_duration_max:
+                logger.debug(f"{service.service_name} | I will increase restoration time ({config.restoration_duration}) by {config.restoration_duration_interval}")
+                config.restoration_duration += config.restoration_duration_interval
+
+    def _decrease_strength(self, service):
+        with self._lock:
+            config = service.config
+            if not isinstance(config, BaseConfig):
+                return
+
+            if config.level_steps > config.level_steps_min:
+                logger.debug(f"{service.service_name} | I will decrease strength ({config.level_steps}) by {config.level_steps_interval}")
+                config.level_steps -= config.level_steps_interval
+            
+            if config.restoration_duration > config.restoration_duration_min:
+                logger.debug(f"{service.service_name} | I will decrease restoration time ({config.restoration_duration}) by {config.restoration_duration_interval}")
+                config.restoration_duration -= config.restoration_duration_interval
@@ -1,30 +1,105 @@
+import logging
 from queue import Queue, Empty, Full
 from dataclass.Message import Message
 from enums.ServicesEnum import ServicesEnum
+from enums.TopicEnum import TopicEnum
+from enums.QueuePolicyEnum import QueuePolicyEnum
+from enums.PriorityEnum import PriorityEnum
+from utils.BoundedQueue import BoundedQueue
+from utils.Metrics import metrics
+
+logger = logging.getLogger(__name__)
 
 class MessagingService:
+    # Capacity and overflow policy of the queues, services override them for their needs
+    queue_capacity = 64
+    queue_policy = QueuePolicyEnum.DropOldest
+    # Optional utils.MessagePool for services that send at a high rate
+    message_pool = None
+
     def __init__(self):
         """
         Initialize the MessagingService with separate incoming and outgoing queues.
         """
-        self.outgoing_queue = Queue()
-        self.incoming_queue = Queue()
-        self.internal_queue = Queue()
+        self.outgoing_queue = BoundedQueue(self.queue_capacity, self.queue_policy)
+        self.incoming_queue = BoundedQueue(self.queue_capacity, self.queue_policy)
+        self.internal_queue = BoundedQueue(self.queue_capacity, self.queue_policy)
+        self.router = None
+        self.tracer = None
+        self.messages_sent = 0
+        self.messages_received = 0
+        metrics.collector(self._queue_metrics)
 
-    def send_message(self, service_name, data, metadata = None, queue: Queue = None, block = True, timeout = None, target_output:ServicesEnum = None):
+    def send_message(self, service_name, data, metadata = None, queue: Queue = None, block = True, timeout = None, target_output:ServicesEnum = None, topic:TopicEnum = None, priority:PriorityEnum = PriorityEnum.Normal):
         """
         Send a message to the specified queue.
+        Outgoing messages are published directly through the router if the service is registered at one.
         """
         target_queue = queue or self.outgoing_queue
         if target_queue:
-            message = Message(service = service_name, data = data, metadata = metadata, target_output = target_output)
+            # Known services are identified by their small integer enum instead of the name
+            service = ServicesEnum.from_label(service_name) or service_name
+            if self.message_pool is not None:
+                message = self.message_pool.acquire(service, data, metadata, target_output, topic, priority)
+            else:
+                message = Message(service = service, data = data, metadata = metadata, target_output = target_output, topic = topic, priority = priority)
+            if self.tracer is not None:
+                message.trace_id = self.tracer.start(service, message.timestamp)
+            self.messages_sent += 1
+            if self.router is not None and target_queue is self.outgoing_queue:
+                self.router.publish(message, publisher = self)
+                return
             try:
                 if block:
                     target_queue.put(message, timeout = timeout)
                 else:
                     target_queue.put_nowait(message)
             except Full:
-                print(f"Que is full. Message {message} was not sent")
+                logger.warning(f"Queue is full. Message {message} was not sent")
+                if isinstance(target_queue, BoundedQueue):
+                    target_queue.count_rejected()
+                message.release()
+
+    def receive_messages(self, queue: BoundedQueue = None, block = False, timeout = None, max_messages = None):
+        """
+        Receive all messages available in the specified queue at once.
+        :param block: Wait until at least one message is available, raises Empty when the timeout expires.
+        :param timeout: Maximum time to wait in seconds, None waits forever.
+        :param max_messages: Optional maximum number of messages to receive.
+        :return: List of messages, empty if none are available and block is False.
+        """
+        source_queue = queue or self.incoming_queue
+        messages = source_queue.get_batch(block = block, timeout = timeout, max_items = max_messages)
+        for message in messages:
+            if not isinstance(message, Message):
+                raise ValueError("Received an invalid message type")
+        self.messages_received += len(messages)
+        return messages
+
+    def queue_stats(self):
+        """
+        Return size, capacity and overflow counters of the queues.
+        """
+        return {
+            "incoming": self.incoming_queue.stats(),
+            "outgoing": self.outgoing_queue.stats(),
+            "internal": self.internal_queue.stats(),
+        }
+
+    def _queue_metrics(self):
+        """
+        Message counters and the depth and overflow counters of the queues for the metrics registry.
+        The queue stats are only read when a snapshot is taken.
+        """
+        name = getattr(self, "service_name", type(self).__name__)
+        counters = {f"{name}.messages_sent": self.messages_sent, f"{name}.messages_received": self.messages_received}
+        gauges = {}
+        for queue_name, stats in self.queue_stats().items():
+            counters[f"{name}.{queue_name}.dropped"] = stats["dropped"]
+            counters[f"{name}.{queue_name}.coalesced"] = stats["coalesced"]
+            gauges[f"{name}.{queue_name}.size"] = stats["size"]
+            gauges[f"{name}.{queue_name}.capacity"] = stats["capacity"]
+        return counters, gauges
 
     def receive_message(self, queue: Queue = None, block = True, timeout = 1):
         """
@@ -35,5 +110,6 @@ class MessagingService:
             message = source_queue.get(timeout = timeout) if block else source_queue.get_nowait()
             if not isinstance(message, Message):
                 raise ValueError("Received an invalid message type")
+            self.messages_received += 1
             return message
             
\ No newline at end of file
@@ -0,0 +1,94 @@
+import threading
+import time
+import weakref
+from utils.Histogram import Histogram
+
+class Counter:
+    def __init__(self):
+        """
+        Monotonic counter. Increments are not locked, they are meant for the hot loops of a single thread.
+        """
+        self.value = 0
+
+    def increment(self, amount = 1):
+        self.value += amount
+
+class Gauge:
+    def __init__(self, function = None):
+        """
+        Current value of something, either set explicitly or read from a function when a snapshot is taken.
+        """
+        self.value = None
+        self.function = function
+
+    def set(self, value):
+        self.value = value
+
+    def read(self):
+        return self.function() if self.function is not None else self.value
+
+class MetricsRegistry:
+    def __init__(self):
+        """
+        Named counters, gauges and histograms of the running services.
+        Services that keep their own plain counters register a collector instead, a function that is only called
+        when a snapshot is taken, so recording stays a single increment in the hot loops.
+        """
+        self.counters: dict[str, Counter] = {}
+        self.gauges: dict[str, Gauge] = {}
+        self.histograms: dict[str, Histogram] = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def counter(self, name):
+        with self._lock:
+            return self.counters.setdefault(name, Counter())
+
+    def gauge(self, name, function = None):
+        with self._lock:
+            gauge = self.gauges.setdefault(name, Gauge())
+            if function is not None:
+                gauge.function = function
+            return gauge
+
+    def histogram(self, name, bounds = None):
+        with self._lock:
+            return self.histograms.setdefault(name, Histogram(bounds))
+
+    def collector(self, method):
+        """
+        Register a bound method that returns a tuple of counters and gauges, each a dict of name and value.
+        The registry only keeps a weak reference, the collector disappears with its service.
+        """
+        with self._lock:
+            self._collectors.append(weakref.WeakMethod(method))
+
+    def snapshot(self):
+        """
+        Return all metrics as plain values, histograms in their snapshot form.
+        """
+        with self._lock:
+            counters = {name: counter.value for name, counter in self.counters.items()}
+            gauges = dict(self.gauges)
+            histograms = dict(self.histograms)
+            self._collectors = [collector for collector in self._collectors if collector() is not None]
+            collectors = list(self._collectors)
+
+        gauge_values = {name: gauge.read() for name, gauge in gauges.items()}
+        for reference in collectors:
+            method = reference()
+            if method is None:
+                continue
+            collected_counters, collected_gauges = method()
+            counters.update(collected_counters)
+            gauge_values.update(collected_gauges)
+
+        return {
+            "time": time.time(),
+            "counters": counters,
+            "gauges": gauge_values,
+            "histograms": {name: histogram.snapshot() for name, histogram in histograms.items()},
+        }
+
+# Registry that all services record into
+metrics = MetricsRegistry()
@@ -0,0 +1,96 @@
+import json
+import logging
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from utils.Metrics import MetricsRegistry, metrics
+from utils.ThreadedService import ThreadedService
+
+logger = logging.getLogger(__name__)
+
+class MetricsReporter(ThreadedService):
+    def __init__(self, service_name = "Metrics Reporter", registry: MetricsRegistry = None, path = None, port = None, interval = 5, debug = False):
+        """
+        Publishes the metrics of the running services for operations.
+        Every interval a snapshot with the rates of all counters since the previous snapshot is written to a JSON file,
+        optionally a fresh snapshot is served as JSON on http://127.0.0.1:<port>/metrics.
+        :param registry: The metrics registry, defaults to the registry all services record into.
+        :param path: File the snapshot is written to, None disables the file.
+        :param port: Local port of the HTTP endpoint, None disables the endpoint.
+        :param interval: Seconds between two snapshots.
+        """
+        super().__init__(service_name, debug)
+        logger.setLevel(logging.DEBUG if debug else logging.INFO)
+        self.registry = registry or metrics
+        self.path = path
+        self.port = port
+        self.interval = interval
+        self.rates = {}
+        self._previous = None
+        self._server = None
+        self._server_thread = None
+
+    def setup(self):
+        if self.port is None:
+            return
+
+        reporter = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") not in ("", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = json.dumps(reporter.snapshot(), default=str).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", self.port), MetricsHandler)
+        self._server_thread = threading.Thread(target=self._server.serve_forever, name=f"{self.service_name} HTTP", daemon=True)
+        self._server_thread.start()
+        logger.info(f"Serving metrics on http://127.0.0.1:{self._server.server_address[1]}/metrics")
+
+    def loop(self):
+        with self.waiting():
+            if self._stop_event.wait(self.interval):
+                return
+
+        snapshot = self.registry.snapshot()
+        if self._previous is not None:
+            elapsed = snapshot["time"] - self._previous["time"]
+            self.rates = {
+                name: (value - self._previous["counters"].get(name, 0)) / elapsed
+                for name, value in snapshot["counters"].items()
+            } if elapsed > 0 else {}
+        self._previous = snapshot
+        snapshot["rates"] = self.rates
+
+        if self.path:
+            self._write(snapshot)
+
+    def snapshot(self):
+        """
+        A fresh snapshot of the registry with the counter rates of the last interval.
+        """
+        snapshot = self.registry.snapshot()
+        snapshot["rates"] = self.rates
+        return snapshot
+
+    def _write(self, snapshot):
+        # Readers never see a partially written file
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w") as file:
+            json.dump(snapshot, file, indent=2, default=str)
+        os.replace(temporary_path, self.path)
+
+    def cleanup(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
@@ -0,0 +1,46 @@
+import cv2
+import numpy as np
+
+class MotionGate:
+    def __init__(self, learning_rate = 0.05, threshold = 25, min_area = 0.002):
+        """
+        Cheap motion detection with a running average background model on a downscaled grayscale frame.
+        :param learning_rate: How fast the background adapts to the current frame (0-1).
+        :param threshold: Minimum gray value difference of a pixel to count as motion.
+        :param min_area: Minimum share of moving pixels in the frame (0-1) to report motion.
+        """
+        self.learning_rate = learning_rate
+        self.threshold = threshold
+        self.min_area = min_area
+        self._background = None
+        self._background_u8 = None
+        self._difference = None
+        self._mask = None
+
+    def update(self, gray):
+        """
+        Feed the next grayscale frame into the background model.
+        :param gray: The grayscale frame.
+        :return: Bounding box (x, y, w, h) of the moving pixels or None if there is no motion.
+        """
+        if self._background is None or self._background.shape != gray.shape:
+            self._allocate(gray)
+            return (0, 0, gray.shape[1], gray.shape[0])
+
+        cv2.convertScaleAbs(self._background, dst=self._background_u8)
+        cv2.absdiff(gray, self._background_u8, dst=self._difference)
+        cv2.threshold(self._difference, self.threshold, 255, cv2.THRESH_BINARY, dst=self._mask)
+        cv2.accumulateWeighted(gray, self._background, self.learning_rate)
+
+        if cv2.countNonZero(self._mask) < self.min_area * self._mask.size:
+            return None
+        return cv2.boundingRect(cv2.findNonZero(self._mask))
+
+    def reset(self):
+        self._background = None
+
+    def _allocate(self, gray):
+        self._background = gray.astype(np.float32)
+        self._background_u8 = np.empty_like(gray)
+        self._difference = np.empty_like(gray)
+        self._mask = np.empty_like(gray)
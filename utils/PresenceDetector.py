@@ -0,0 +1,25 @@
+from enums.PresenceEventEnum import PresenceEventEnum
+
+class PresenceDetector:
+    def __init__(self, threshold, hysteresis = 10):
+        """
+        Turns filtered distances into presence events. Someone enters below the threshold and only leaves
+        above threshold + hysteresis, so a distance around the threshold does not toggle the presence.
+        :param threshold: Distance in cm below which someone is present.
+        :param hysteresis: Additional distance in cm needed to leave.
+        """
+        self.threshold = threshold
+        self.hysteresis = hysteresis
+        self.present = False
+
+    def update(self, distance):
+        """
+        :return: PresenceEventEnum.Enter or PresenceEventEnum.Leave if the presence changed, otherwise None.
+        """
+        if not self.present and distance < self.threshold:
+            self.present = True
+            return PresenceEventEnum.Enter
+        if self.present and distance > self.threshold + self.hysteresis:
+            self.present = False
+            return PresenceEventEnum.Leave
+        return None
@@ -0,0 +1,100 @@
+import contextlib
+import threading
+import time
+
+class ProfileSpan:
+    __slots__ = ("profiler", "stage", "step", "start")
+
+    def __init__(self, profiler, stage, step):
+        self.profiler = profiler
+        self.stage = stage
+        self.step = step
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exception):
+        self.profiler.record(self.stage, self.step, time.perf_counter_ns() - self.start)
+        return False
+
+class Profiler:
+    _disabled_span = contextlib.nullcontext()
+
+    def __init__(self):
+        """
+        Opt-in cost breakdown of the image pipeline. Every effect and presentation step is measured in a span
+        and aggregated per Stage and step. While disabled a span is a shared no-op context manager.
+        """
+        self.enabled = False
+        self._costs: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def span(self, stage, step):
+        """
+        Measure the enclosed block as a step of a stage, e.g. with profiler.span(Stage.BLURRY, "blur"): ...
+        """
+        if not self.enabled:
+            return self._disabled_span
+        return ProfileSpan(self, stage, step)
+
+    def record(self, stage, step, duration_ns):
+        with self._lock:
+            cost = self._costs.get((stage, step))
+            if cost is None:
+                self._costs[(stage, step)] = [1, duration_ns, duration_ns]
+            else:
+                cost[0] += 1
+                cost[1] += duration_ns
+                cost[2] = max(cost[2], duration_ns)
+
+    def reset(self):
+        with self._lock:
+            self._costs.clear()
+
+    def breakdown(self):
+        """
+        Return the aggregated costs per stage and step: count, total, mean and max in milliseconds
+        and the share of the step in the time spent in its stage.
+        """
+        with self._lock:
+            costs = {key: list(cost) for key, cost in self._costs.items()}
+
+        stage_totals = {}
+        for (stage, _), (_, total_ns, _) in costs.items():
+            stage_totals[stage] = stage_totals.get(stage, 0) + total_ns
+
+        breakdown = {}
+        for (stage, step), (count, total_ns, max_ns) in costs.items():
+            breakdown.setdefault(stage, {})[step] = {
+                "count": count,
+                "total_ms": total_ns / 1e6,
+                "mean_ms": total_ns / count / 1e6,
+                "max_ms": max_ns / 1e6,
+                "share": total_ns / stage_totals[stage] if stage_totals[stage] else 0.0,
+            }
+        return breakdown
+
+    def report(self):
+        """
+        Format the breakdown as a table, the stages ordered by their total time.
+        """
+        breakdown = self.breakdown()
+        if not breakdown:
+            return "No stage was profiled"
+
+        lines = [f"{'stage':<12} {'step':<12} {'count':>7} {'mean ms':>9} {'max ms':>9} {'total ms':>10} {'share':>6}"]
+        stages = sorted(breakdown.items(), key=lambda item: -sum(cost["total_ms"] for cost in item[1].values()))
+        for stage, steps in stages:
+            for step, cost in sorted(steps.items(), key=lambda item: -item[1]["total_ms"]):
+                lines.append(f"{getattr(stage, 'name', str(stage)):<12} {step:<12} {cost['count']:>7} {cost['mean_ms']:>9.3f} {cost['max_ms']:>9.3f} {cost['total_ms']:>10.1f} {cost['share'] * 100:>5.1f}%")
+        return "\n".join(lines)
+
+# Profiler of the image pipeline, enabled by main.py --profile
+profiler = Profiler()
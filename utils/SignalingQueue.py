@@ -0,0 +1,16 @@
+from queue import Queue
+
+class SignalingQueue(Queue):
+    def __init__(self, maxsize = 0, signal = None):
+        """
+        Queue that sets a signal whenever a message is put, so a consumer can wait on several sources at once.
+        :param maxsize: Maximum number of queued items, 0 for unbounded.
+        :param signal: Object with a set() method, e.g. threading.Event.
+        """
+        super().__init__(maxsize)
+        self.signal = signal
+
+    def _put(self, item):
+        super()._put(item)
+        if self.signal is not None:
+            self.signal.set()
@@ -1,17 +1,32 @@
 import threading
 import logging
+import time
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from utils.Metrics import metrics
 
 logger = logging.getLogger(__name__)
 
 class ThreadedService(ABC):
+    # ServicesEnum of services whose setup() has to finish before the setup of this service starts
+    setup_after = ()
+
     def __init__(self, service_name, debug=False):
         self.service_name = service_name
         logger.setLevel(logging.DEBUG if debug else logging.INFO)
         self._stop_event = threading.Event()
         self._thread = None
         self._is_running = False
+        self._is_set_up = False
+        self.setup_time = None
         self.debug = debug
+        self.loops = 0
+        self.errors = 0
+        # The loop time only counts the busy part of an iteration, blocking waits are recorded separately
+        self.loop_duration = metrics.histogram(f"{service_name}.loop_ms")
+        self.wait_duration = metrics.histogram(f"{service_name}.wait_ms")
+        self._wait_ns = 0
+        metrics.collector(self._service_metrics)
         logger.info(f"{service_name} initialized")
 
     @abstractmethod
@@ -38,13 +53,24 @@ class ThreadedService(ABC):
         """
         pass
 
-    def start(self):
+    def prepare(self):
         """
-        Start the service and its background thread.
+        Run setup() once before the service is started, e.g. concurrently with the setup of other services.
         """
+        if self._is_set_up:
+            return
+        start = time.perf_counter()
         self.setup()
+        self.setup_time = time.perf_counter() - start
+        self._is_set_up = True
+
+    def start(self):
+        """
+        Start the service and its background thread, setting it up first if that did not happen yet.
+        """
+        self.prepare()
         self._is_running = True
-        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread = threading.Thread(target=self._run, name=self.service_name, daemon=True)
         self._thread.start()
         logger.info(f"Starting {self.service_name}")
 
@@ -62,6 +88,7 @@ class ThreadedService(ABC):
                 logger.warning(f"Interrupted while waiting for {self.service_name} to stop")
         self.cleanup()
         self._is_running = False
+        self._is_set_up = False
         logger.info(f"Stopping {self.service_name}")
 
     def _run(self):
@@ -70,7 +97,39 @@ class ThreadedService(ABC):
         """
         logger.info(f"{self.service_name} is running")
         while not self._stop_event.is_set():
+            start = time.perf_counter_ns()
             try:
                 self.loop()
             except Exception as e:
+                self.errors += 1
                 logger.error(f"Error in {self.service_name}: {e}")
+            self._record_loop(start)
+
+    @contextmanager
+    def waiting(self):
+        """
+        Mark a blocking wait in the loop, e.g. for a message or a timer. Its time is recorded as wait time, not as loop time.
+        """
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self._wait_ns += time.perf_counter_ns() - start
+
+    def _record_loop(self, start):
+        """
+        Record the busy and the waiting time of the iteration that started at the given perf_counter_ns.
+        """
+        elapsed = time.perf_counter_ns() - start
+        self.loops += 1
+        self.loop_duration.record((elapsed - self._wait_ns) / 1e6)
+        self.wait_duration.record(self._wait_ns / 1e6)
+        self._wait_ns = 0
+
+    def _service_metrics(self):
+        """
+        Counters and gauges of the service loop for the metrics registry.
+        """
+        counters = {f"{self.service_name}.loops": self.loops, f"{self.service_name}.errors": self.errors}
+        gauges = {f"{self.service_name}.running": self._is_running}
+        return counters, gauges
@@ -0,0 +1,121 @@
+import itertools
+import json
+import threading
+import time
+from collections import OrderedDict, deque
+from enums.TraceHopEnum import TraceHopEnum
+from utils.Histogram import Histogram
+
+class Tracer:
+    def __init__(self, max_events = 100000, max_open_traces = 10000):
+        """
+        Follows messages from the sensor through the router to the image display and the presented frame.
+        A trace id is assigned when a message is sent, every hop records a monotonic timestamp and the time
+        since the previous hop of the trace goes into a histogram per hop, Emit to Present into a total histogram.
+        Services only trace if a tracer is set, so tracing costs nothing when it is off.
+        :param max_events: Number of hop events kept for the export.
+        :param max_open_traces: Number of traces whose hops are still matched, older traces are dropped.
+        """
+        self.max_open_traces = max_open_traces
+        self.events = deque(maxlen=max_events)
+        self.histograms = {hop: Histogram() for hop in TraceHopEnum if hop != TraceHopEnum.Emit}
+        self.total = Histogram()
+        self._traces = OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def start(self, service, timestamp_ns = None):
+        """
+        Start a trace with the Emit hop.
+        :param service: The sending service.
+        :param timestamp_ns: Monotonic time of the emit, e.g. the message timestamp.
+        :return: The trace id.
+        """
+        timestamp_ns = timestamp_ns or time.monotonic_ns()
+        with self._lock:
+            trace_id = next(self._ids)
+            self._traces[trace_id] = {TraceHopEnum.Emit: timestamp_ns}
+            if len(self._traces) > self.max_open_traces:
+                self._traces.popitem(last=False)
+            self.events.append((trace_id, TraceHopEnum.Emit, timestamp_ns, str(service)))
+        return trace_id
+
+    def hop(self, trace_id, hop: TraceHopEnum, timestamp_ns = None):
+        """
+        Record a hop of a trace. Only the first time a trace passes a hop counts.
+        The receive hop is recorded by the image display, the output that renders and presents the traced messages.
+        """
+        timestamp_ns = timestamp_ns or time.monotonic_ns()
+        with self._lock:
+            hops = self._traces.get(trace_id)
+            if hops is None or hop in hops:
+                return
+            previous = max((recorded for recorded in hops if recorded < hop), default=None)
+            hops[hop] = timestamp_ns
+            self.events.append((trace_id, hop, timestamp_ns, None))
+            hop_ms = (timestamp_ns - hops[previous]) / 1e6 if previous is not None else None
+            total_ms = (timestamp_ns - hops[TraceHopEnum.Emit]) / 1e6
+
+        if hop_ms is not None:
+            self.histograms[hop].record(hop_ms)
+        if hop == TraceHopEnum.Present:
+            self.total.record(total_ms)
+
+    def hops(self, trace_ids, hop: TraceHopEnum):
+        """
+        Record the same hop for several traces at once, e.g. all messages shown by one frame.
+        """
+        timestamp_ns = time.monotonic_ns()
+        for trace_id in trace_ids:
+            self.hop(trace_id, hop, timestamp_ns)
+
+    def summary(self):
+        """
+        Return the latency histograms in milliseconds, every hop measured from the previous hop.
+        """
+        summary = {hop.name: histogram.snapshot() for hop, histogram in self.histograms.items()}
+        summary["Total"] = self.total.snapshot()
+        return summary
+
+    def export_jsonl(self, path):
+        """
+        Write every recorded hop as one JSON object per line.
+        """
+        with self._lock:
+            events = list(self.events)
+        with open(path, "w") as file:
+            for trace_id, hop, timestamp_ns, service in events:
+                event = {"trace_id": trace_id, "hop": hop.name, "time_ns": timestamp_ns}
+                if service:
+                    event["service"] = service
+                file.write(json.dumps(event) + "\n")
+
+    def export_chrome_trace(self, path):
+        """
+        Write the traces in the Chrome trace event format, viewable in chrome://tracing or Perfetto.
+        Every hop of a trace becomes a slice from the previous hop on the row of that hop.
+        """
+        with self._lock:
+            events = list(self.events)
+
+        previous = {}
+        services = {}
+        trace_events = [{"name": "thread_name", "ph": "M", "pid": 1, "tid": int(hop), "args": {"name": hop.name}} for hop in TraceHopEnum]
+        for trace_id, hop, timestamp_ns, service in events:
+            if service:
+                services[trace_id] = service
+            if trace_id in previous:
+                start_ns = previous[trace_id]
+                trace_events.append({
+                    "name": f"{services.get(trace_id, 'trace')} #{trace_id}",
+                    "ph": "X",
+                    "pid": 1,
+                    "tid": int(hop),
+                    "ts": start_ns / 1000,
+                    "dur": (timestamp_ns - start_ns) / 1000,
+                    "args": {"trace_id": trace_id},
+                })
+            previous[trace_id] = timestamp_ns
+
+        with open(path, "w") as file:
+            json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms"}, file)
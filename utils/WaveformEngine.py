@@ -0,0 +1,179 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable
+import numpy as np
+from enums.WaveformEnum import WaveformEnum
+
+logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=64)
+def envelope(waveform: WaveformEnum, duration: float, tick_rate: int):
+    """
+    Precompute the envelope of a waveform with one value (0-1) per tick. Envelopes are cached by their parameters.
+    The value of a channel is start + (target - start) * envelope.
+    """
+    ticks = max(1, int(round(duration * tick_rate)))
+    phase = np.linspace(0.0, 1.0, ticks + 1)[1:]
+    match waveform:
+        case WaveformEnum.Ramp:
+            values = phase
+        case WaveformEnum.Fade:
+            values = 0.5 - 0.5 * np.cos(np.pi * phase)
+        case WaveformEnum.Pulse:
+            values = np.sin(np.pi * phase)
+        case WaveformEnum.Breathe:
+            values = 0.5 - 0.5 * np.cos(2 * np.pi * phase)
+        case _:
+            values = np.ones(ticks)
+    values.flags.writeable = False
+    return values
+
+@dataclass(slots=True)
+class WaveformChannel:
+    apply: Callable[[Any], None]
+    value: np.ndarray
+    start: np.ndarray = None
+    target: np.ndarray = None
+    envelope: np.ndarray = None
+    start_time: float = 0.0
+    repeat: bool = False
+    playing: bool = False
+
+class WaveformEngine:
+    def __init__(self, tick_rate = 100):
+        """
+        Plays precomputed envelopes on PWM devices at a fixed tick rate. A single timer thread serves all devices
+        and only ticks while at least one waveform plays.
+        :param tick_rate: Updates per second.
+        """
+        self.tick_rate = tick_rate
+        self._channels: dict[str, WaveformChannel] = {}
+        self._condition = threading.Condition()
+        self._thread = None
+        self._running = False
+        self.ticks = 0
+        self.late_ticks = 0
+        self.tick_time_ns = 0
+        self.updates = 0
+        self._tick_intervals = 0
+        self._tick_interval_sum = 0.0
+        self._last_tick_time = None
+
+    def register(self, channel, apply, value = 0.0):
+        """
+        Register a PWM channel.
+        :param channel: Unique name of the channel.
+        :param apply: Function that sets the device, called with a float or, for multi value channels like an RGB LED, a tuple.
+        :param value: The current value of the device, a float or a tuple.
+        """
+        with self._condition:
+            self._channels[channel] = WaveformChannel(apply = apply, value = np.atleast_1d(np.asarray(value, dtype=np.float64)))
+
+    def unregister(self, channel):
+        with self._condition:
+            self._channels.pop(channel, None)
+
+    def play(self, channel, waveform: WaveformEnum, duration, target, start = None, repeat = False):
+        """
+        Play a waveform on a channel, replacing the waveform that currently plays on it.
+        :param waveform: Shape of the envelope.
+        :param duration: Duration of one period in seconds.
+        :param target: Value the envelope leads to (Ramp, Fade, Step) or peaks at (Pulse, Breathe).
+        :param start: Value the envelope starts at, defaults to the current value so transitions stay smooth.
+        :param repeat: Repeat the envelope until another waveform is played on the channel.
+        """
+        with self._condition:
+            state = self._channels[channel]
+            state.start = state.value.copy() if start is None else np.atleast_1d(np.asarray(start, dtype=np.float64))
+            state.target = np.atleast_1d(np.asarray(target, dtype=np.float64))
+            state.envelope = envelope(waveform, float(duration), self.tick_rate)
+            state.start_time = time.monotonic()
+            state.repeat = repeat
+            state.playing = True
+            self._ensure_running()
+            self._condition.notify()
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._thread:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def stats(self):
+        """
+        Return the measured tick rate and the CPU time the ticks need.
+        """
+        with self._condition:
+            return {
+                "ticks": self.ticks,
+                "tick_rate": self._tick_intervals / self._tick_interval_sum if self._tick_interval_sum else 0.0,
+                "late_ticks": self.late_ticks,
+                "cpu_us_per_tick": self.tick_time_ns / self.ticks / 1000 if self.ticks else 0.0,
+                "updates": self.updates,
+                "envelopes_cached": envelope.cache_info().currsize,
+            }
+
+    def _ensure_running(self):
+        if not self._running:
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name="Waveform Engine", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        period = 1.0 / self.tick_rate
+        with self._condition:
+            next_tick = time.monotonic()
+            while self._running:
+                if not any(state.playing for state in self._channels.values()):
+                    # Nothing plays, the thread sleeps until the next waveform
+                    self._condition.wait()
+                    next_tick = time.monotonic()
+                    self._last_tick_time = None
+                    continue
+
+                now = time.monotonic()
+                if now < next_tick:
+                    self._condition.wait(next_tick - now)
+                    continue
+                if now - next_tick > period:
+                    self.late_ticks += 1
+                    next_tick = now
+
+                started = time.thread_time_ns()
+                self._tick(now)
+                self.tick_time_ns += time.thread_time_ns() - started
+                self.ticks += 1
+                if self._last_tick_time is not None:
+                    # Only intervals between consecutive ticks count for the rate, not the idle time between waveforms
+                    self._tick_intervals += 1
+                    self._tick_interval_sum += now - self._last_tick_time
+                self._last_tick_time = now
+                next_tick += period
+
+    def _tick(self, now):
+        for state in self._channels.values():
+            if not state.playing:
+                continue
+
+            index = int((now - state.start_time) * self.tick_rate)
+            if index >= len(state.envelope):
+                if state.repeat:
+                    index %= len(state.envelope)
+                else:
+                    index = len(state.envelope) - 1
+                    state.playing = False
+
+            value = state.start + (state.target - state.start) * state.envelope[index]
+            if not np.array_equal(value, state.value):
+                state.value = value
+                self.updates += 1
+                try:
+                    state.apply(float(value[0]) if len(value) == 1 else tuple(value.tolist()))
+                except Exception as e:
+                    logger.error(f"Failed to apply waveform: {e}")
+                    state.playing = False